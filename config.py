@@ -32,6 +32,11 @@ INVOICE_OUTPUT_DIR = os.path.join(BASE_DIR, "generated_invoices")
 # Create output directory if it doesn't exist
 os.makedirs(INVOICE_OUTPUT_DIR, exist_ok=True)
 
+# OCR settings
+OCR_CACHE_DIR = os.path.join(BASE_DIR, "ocr_cache")  # Raw OCR text keyed by image hash
+OCR_MEMORY_CACHE_SIZE = 512  # Entries kept in memory in front of the disk cache
+OCR_DISK_CACHE_SIZE = 2048  # Files kept on disk; the least recently used are evicted
+
 # Company information (update these with actual company details)
 COMPANY_INFO = {
     "name": "Your Company Name",
@@ -5,11 +5,123 @@ Handles all database schema creation and CRUD operations
 
 import sqlite3
 import json
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Optional, Sequence, Tuple
 from pathlib import Path
 import config
 
+if TYPE_CHECKING:
+    # pandas is imported by the DataFrame accessors on first use
+    import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+# Bump whenever initialize_db gains new DDL so existing databases pick it up
+SCHEMA_VERSION = 16
+
+# Aging bucket of a row from its days_overdue (NULL when due_date is invalid)
+_AGING_BUCKET_SQL = """
+    CASE
+        WHEN days_overdue < 0 THEN 'current'
+        WHEN days_overdue <= 30 THEN '0-30'
+        WHEN days_overdue <= 60 THEN '31-60'
+        WHEN days_overdue <= 90 THEN '61-90'
+        ELSE '90+'
+    END
+"""
+
+
+# An expense row's amount in whole paise. expense_totals keeps integer paise
+# so the running sums stay exact however many times they are adjusted
+_PAISE_SQL = "CAST(ROUND(IFNULL({row}.amount, 0) * 100) AS INTEGER)"
+
+# Trigger bodies keeping expense_totals in step with one expenses row;
+# {row} is NEW or OLD
+_EXPENSE_TOTALS_ADD_SQL = f"""
+    INSERT INTO expense_totals (category, total_paise, paid_paise, pending_paise, count)
+    VALUES ({{row}}.category,
+            {_PAISE_SQL},
+            CASE WHEN {{row}}.payment_status = 'paid' THEN {_PAISE_SQL} ELSE 0 END,
+            CASE WHEN {{row}}.payment_status IS NOT 'paid' THEN {_PAISE_SQL} ELSE 0 END,
+            1)
+    ON CONFLICT(category) DO UPDATE SET
+        total_paise = total_paise + excluded.total_paise,
+        paid_paise = paid_paise + excluded.paid_paise,
+        pending_paise = pending_paise + excluded.pending_paise,
+        count = count + 1;
+"""
+_EXPENSE_TOTALS_SUBTRACT_SQL = f"""
+    UPDATE expense_totals SET
+        total_paise = total_paise - {_PAISE_SQL},
+        paid_paise = paid_paise - CASE WHEN {{row}}.payment_status = 'paid' THEN {_PAISE_SQL} ELSE 0 END,
+        pending_paise = pending_paise - CASE WHEN {{row}}.payment_status IS NOT 'paid' THEN {_PAISE_SQL} ELSE 0 END,
+        count = count - 1
+    WHERE category = {{row}}.category;
+"""
+
+# Columns SQLite computes from the stored ones. They serve filters, sorts
+# and indexes, and are left out of the records the get_* methods return
+_GENERATED_COLUMNS = frozenset({
+    "items_count", "date_iso", "place_of_supply_state",
+    "due_date_iso", "date_ord", "due_date_ord",
+})
+
+
+def _iso_date_sql(column: str) -> str:
+    """
+    SQL expression turning a date text column into YYYY-MM-DD
+    
+    Accepts YYYY-MM-DD (optionally followed by a time) as well as
+    DD-MM-YYYY, DD/MM/YYYY and DD.MM.YYYY, the forms callers store.
+    """
+    return (f"(CASE WHEN {column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+            f"THEN substr({column}, 1, 10) "
+            f"ELSE substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || "
+            f"substr({column}, 1, 2) END)")
+
+
+def _ordinal_sql(column: str) -> str:
+    """
+    SQL expression turning a date text column into a proleptic Gregorian
+    ordinal, matching Python's date.toordinal() (NULL if invalid)
+    
+    Accepts the same forms as _iso_date_sql.
+    """
+    # julianday() of 0001-01-01 is 1721425.5, and that date is ordinal 1
+    return f"CAST(julianday({_iso_date_sql(column)}) - 1721424.5 AS INTEGER)"
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize obj to a JSON string, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _projection(columns: Optional[Sequence[str]]) -> str:
+    """Build the SELECT column list, defaulting to all columns"""
+    if not columns:
+        return "*"
+    for column in columns:
+        if not column.isidentifier():
+            raise ValueError(f"Invalid column name: {column!r}")
+    return ", ".join(columns)
+
+
+def _close_connection(connection: sqlite3.Connection) -> None:
+    """Close a connection, first letting SQLite refresh stale planner statistics"""
+    try:
+        # The limit keeps the ANALYZE that optimize may run cheap on big tables
+        connection.execute("PRAGMA analysis_limit = 400")
+        connection.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass  # Statistics only guide the planner; close regardless
+    connection.close()
+
 
 class Database:
     """SQLite database manager for the accounting application"""
@@ -17,29 +129,117 @@ class Database:
     def __init__(self, db_path: str = config.DATABASE_PATH):
         """Initialize database connection"""
         self.db_path = db_path
-        self.connection = None
-        self.cursor = None
+        # One connection per thread, so WAL lets their reads run in
+        # parallel. Only explicit transactions take the write lock, held
+        # from begin() to commit()/rollback(); single statements rely on
+        # SQLite's own write lock
+        self._tls = threading.local()
+        self._write_lock = threading.RLock()
+        # Open connections by owning thread, so those of finished threads
+        # (Streamlit runs each rerun on a new one) are closed, not leaked
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        self._settings_cache: Optional[Dict[str, str]] = None
         self.initialize_db()
     
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread, opened on first use"""
+        if getattr(self._tls, 'connection', None) is None:
+            self.connect()
+        return self._tls.connection
+    
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """Cursor owned by the calling thread, opened on first use"""
+        if getattr(self._tls, 'cursor', None) is None:
+            self.connect()
+        return self._tls.cursor
+    
     def connect(self) -> None:
-        """Create database connection"""
-        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.connection.row_factory = sqlite3.Row
-        self.cursor = self.connection.cursor()
+        """Create database connection for the calling thread"""
+        # Autocommit mode: each statement commits on its own unless wrapped
+        # in an explicit begin()/commit() pair. The statement cache is sized
+        # so the fixed report queries stay compiled across calls
+        connection = sqlite3.connect(self.db_path, check_same_thread=False,
+                                     isolation_level=None, cached_statements=256)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        
+        with self._connections_lock:
+            finished = [self._connections.pop(thread) for thread in list(self._connections)
+                        if not thread.is_alive()]
+            self._connections[threading.current_thread()] = connection
+        for old_connection in finished:
+            _close_connection(old_connection)
+        
+        self._tls.connection = connection
+        self._tls.cursor = connection.cursor()
     
     def close(self) -> None:
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
+        """Close the calling thread's database connection"""
+        connection = getattr(self._tls, 'connection', None)
+        if connection:
+            with self._connections_lock:
+                self._connections.pop(threading.current_thread(), None)
+            _close_connection(connection)
+            self._tls.connection = None
+            self._tls.cursor = None
+    
+    def begin(self) -> None:
+        """Start an explicit transaction so several writes commit together"""
+        # Held until commit()/rollback(), so this process's transactions
+        # queue here rather than in SQLite's busy handler
+        self._write_lock.acquire()
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._write_lock.release()
+            raise
+        self._tls.in_transaction = True
+    
+    def commit(self) -> None:
+        """Commit the calling thread's explicit transaction, if any"""
+        self._end_transaction("COMMIT")
+    
+    def rollback(self) -> None:
+        """Roll back the calling thread's explicit transaction, if any"""
+        self._end_transaction("ROLLBACK")
+    
+    def _end_transaction(self, statement: str) -> None:
+        """Finish the transaction begun on this thread and release the lock"""
+        if not getattr(self._tls, 'in_transaction', False):
+            return
+        try:
+            if self.connection.in_transaction:
+                self.cursor.execute(statement)
+        finally:
+            self._tls.in_transaction = False
+            self._write_lock.release()
     
     def initialize_db(self) -> None:
         """Create all required tables if they don't exist"""
         self.connect()
         
+        # Already-initialized databases skip the DDL and its commit entirely
+        self.cursor.execute("PRAGMA user_version")
+        if self.cursor.fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
+        self.begin()
+        try:
+            self._create_schema()
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+    
+    def _create_schema(self) -> None:
+        """Run the schema DDL and upgrades inside initialize_db's transaction"""
         # Sales table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS sales (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 invoice_no TEXT UNIQUE,
                 customer_name TEXT,
                 customer_gstin TEXT,
@@ -58,7 +258,7 @@ class Database:
         # Purchases table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS purchases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 invoice_no TEXT,
                 vendor_name TEXT,
                 vendor_gstin TEXT,
@@ -77,7 +277,7 @@ class Database:
         # Expenses table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 vendor_name TEXT,
                 amount REAL,
                 category TEXT,
@@ -94,7 +294,7 @@ class Database:
         # Bank transactions table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS bank_transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 date TEXT,
                 description TEXT,
                 debit REAL DEFAULT 0,
@@ -110,7 +310,7 @@ class Database:
         # TDS register table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS tds_register (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 party_name TEXT,
                 party_pan TEXT,
                 section TEXT,
@@ -129,7 +329,7 @@ class Database:
         # Creditors table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS creditors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 vendor_name TEXT,
                 invoice_no TEXT,
                 amount REAL,
@@ -140,15 +340,169 @@ class Database:
             )
         """)
         
-        # Settings table
+        # Settings table (rows live directly in the key's B-tree)
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS settings (
                 key TEXT PRIMARY KEY,
                 value TEXT
+            ) WITHOUT ROWID
+        """)
+        
+        # Per-category expense totals in paise, maintained by triggers so
+        # the unfiltered expense summary reads one row per category. Table
+        # and triggers are re-created on each upgrade, which also seeds the
+        # totals for databases created before the triggers existed
+        for trigger in ("insert", "update", "delete"):
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS expense_totals_{trigger}")
+        self.cursor.execute("DROP TABLE IF EXISTS expense_totals")
+        self.cursor.execute("""
+            CREATE TABLE expense_totals (
+                category TEXT PRIMARY KEY,
+                total_paise INTEGER DEFAULT 0,
+                paid_paise INTEGER DEFAULT 0,
+                pending_paise INTEGER DEFAULT 0,
+                count INTEGER DEFAULT 0
             )
         """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER expense_totals_insert AFTER INSERT ON expenses
+            BEGIN {_EXPENSE_TOTALS_ADD_SQL.format(row="NEW")} END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER expense_totals_update
+            AFTER UPDATE OF amount, category, payment_status ON expenses
+            BEGIN
+                {_EXPENSE_TOTALS_SUBTRACT_SQL.format(row="OLD")}
+                {_EXPENSE_TOTALS_ADD_SQL.format(row="NEW")}
+            END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER expense_totals_delete AFTER DELETE ON expenses
+            BEGIN {_EXPENSE_TOTALS_SUBTRACT_SQL.format(row="OLD")} END
+        """)
+        paise = _PAISE_SQL.format(row="expenses")
+        self.cursor.execute(f"""
+            INSERT INTO expense_totals (category, total_paise, paid_paise, pending_paise, count)
+            SELECT category,
+                   SUM({paise}),
+                   SUM(CASE WHEN payment_status = 'paid' THEN {paise} ELSE 0 END),
+                   SUM(CASE WHEN payment_status IS NOT 'paid' THEN {paise} ELSE 0 END),
+                   COUNT(*)
+            FROM expenses GROUP BY category
+        """)
+        
+        # Indexes for the date-ordered listings and filters
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_purchases_date ON purchases(date)")
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_expenses_status_date ON expenses(payment_status, date)"
+        )
+        
+        # Bank listings filter on a date range and category; the composite
+        # index also serves plain date ordering, superseding idx_bank_date
+        self.cursor.execute("DROP INDEX IF EXISTS idx_bank_date")
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bank_txn_date_cat "
+            "ON bank_transactions(date DESC, category)"
+        )
+        
+        # Item counts computed by SQLite's JSON1 from items_json, indexed so
+        # item-based filters never load and parse the JSON in Python
+        for table in ("sales", "purchases"):
+            self._add_column(
+                table, "items_count",
+                "INTEGER GENERATED ALWAYS AS (json_array_length(items_json)) VIRTUAL"
+            )
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_items_count ON {table}(items_count)"
+            )
+        
+        # Invoice dates rearranged to ISO, indexed so period filters are
+        # both chronological and range scans. A generated column cannot be
+        # altered, so these are re-created on each upgrade to pick up the
+        # current expression
+        for table in ("sales", "purchases"):
+            self.cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_date_iso")
+            self._drop_column(table, "date_iso")
+            self._add_column(
+                table, "date_iso",
+                f"TEXT GENERATED ALWAYS AS {_iso_date_sql('date')} VIRTUAL"
+            )
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_date_iso ON {table}(date_iso)"
+            )
+        
+        # State code of each sale's place of supply, from the customer's
+        # GSTIN (NULL when the customer has none)
+        self._add_column(
+            "sales", "place_of_supply_state",
+            "TEXT GENERATED ALWAYS AS "
+            "(CASE WHEN customer_gstin <> '' THEN substr(customer_gstin, 1, 2) END) VIRTUAL"
+        )
+        
+        # Creditor due dates rearranged to ISO so SQLite's date functions
+        # can age them without a Python parse per row (re-created like
+        # date_iso above)
+        self._drop_column("creditors", "due_date_iso")
+        self._add_column(
+            "creditors", "due_date_iso",
+            f"TEXT GENERATED ALWAYS AS {_iso_date_sql('due_date')} VIRTUAL"
+        )
+        
+        # Creditor due dates as day ordinals, so listings sort by date
+        # rather than by the day-of-month that leads the stored text
+        self.cursor.execute("DROP INDEX IF EXISTS idx_creditors_status_due")
+        self._drop_column("creditors", "due_date_ord")
+        self._add_column(
+            "creditors", "due_date_ord",
+            f"INTEGER GENERATED ALWAYS AS ({_ordinal_sql('due_date')}) VIRTUAL"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_creditors_status_due "
+            "ON creditors(status, due_date_ord)"
+        )
+        
+        # Expense dates as day ordinals, so due-date checks are integer
+        # comparisons against date.toordinal() instead of parse_date calls.
+        # A generated column cannot be altered, so both are re-created on
+        # each upgrade to pick up the current expression
+        self.cursor.execute("DROP INDEX IF EXISTS idx_exp_status_due")
+        self.cursor.execute("DROP INDEX IF EXISTS idx_exp_date_ord_cat")
+        for column in ("date", "due_date"):
+            self._drop_column("expenses", f"{column}_ord")
+            self._add_column(
+                "expenses", f"{column}_ord",
+                f"INTEGER GENERATED ALWAYS AS ({_ordinal_sql(column)}) VIRTUAL"
+            )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_exp_status_due ON expenses(payment_status, due_date_ord)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_exp_date_ord_cat ON expenses(date_ord, category)"
+        )
+        
+        # Statistics are left to PRAGMA optimize as connections close. Drop
+        # any an earlier upgrade gathered while the invoice tables were
+        # still empty, which would keep the planner off their indexes
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if self.cursor.fetchone():
+            self.cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl IN ('sales', 'purchases')")
         
-        self.connection.commit()
+        self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _add_column(self, table: str, column: str, definition: str) -> None:
+        """Add a column to an existing table unless it is already there"""
+        # table_xinfo (unlike table_info) also lists generated columns
+        self.cursor.execute(f"PRAGMA table_xinfo({table})")
+        if any(row[1] == column for row in self.cursor.fetchall()):
+            return
+        self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
+    def _drop_column(self, table: str, column: str) -> None:
+        """Drop a column from a table if it is there"""
+        self.cursor.execute(f"PRAGMA table_xinfo({table})")
+        if any(row[1] == column for row in self.cursor.fetchall()):
+            self.cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
     
     # Sales operations
     def insert_sale(self, invoice_no: str, customer_name: str, customer_gstin: str,
@@ -159,35 +513,42 @@ class Database:
             INSERT INTO sales (invoice_no, customer_name, customer_gstin, items_json,
                               subtotal, cgst, sgst, igst, total, date)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (invoice_no, customer_name, customer_gstin, json.dumps(items),
+        """, (invoice_no, customer_name, customer_gstin, _dumps(items),
               subtotal, cgst, sgst, igst, total, date))
-        self.connection.commit()
         return self.cursor.lastrowid
     
-    def get_sales(self, limit: Optional[int] = None) -> List[Dict]:
-        """Get all sales records"""
-        query = "SELECT * FROM sales ORDER BY date DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        self.cursor.execute(query)
-        return [dict(row) for row in self.cursor.fetchall()]
+    def get_sales(self, limit: Optional[int] = None,
+                  columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Get all sales records, optionally projecting only the given columns"""
+        # LIMIT -1 means "no limit" in SQLite, so one statement covers both cases
+        self.cursor.execute(
+            f"SELECT {_projection(columns)} FROM sales ORDER BY date DESC LIMIT ?",
+            (limit or -1,)
+        )
+        return self._fetch_dicts(columns)
+    
+    def get_sales_df(self, limit: Optional[int] = None,
+                     columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+        """Get sales records as a DataFrame for aggregation-heavy callers"""
+        return self._query_df(
+            f"SELECT {_projection(columns)} FROM sales ORDER BY date DESC LIMIT ?",
+            (limit or -1,), columns
+        )
     
     def get_next_invoice_number(self, prefix: str, financial_year: str) -> str:
         """Generate next invoice number"""
+        series = f"{prefix}/{financial_year}/"
+        # GLOB keeps the default BINARY collation, so the prefix match can use
+        # the UNIQUE index on invoice_no instead of scanning the table
         self.cursor.execute("""
-            SELECT invoice_no FROM sales 
-            WHERE invoice_no LIKE ? 
-            ORDER BY id DESC LIMIT 1
-        """, (f"{prefix}/{financial_year}/%",))
+            SELECT MAX(CAST(substr(invoice_no, ?) AS INTEGER)) FROM sales
+            WHERE invoice_no GLOB ?
+        """, (len(series) + 1, f"{series}*"))
         result = self.cursor.fetchone()
         
-        if result:
-            last_no = int(result[0].split('/')[-1])
-            next_no = last_no + 1
-        else:
-            next_no = 1
+        next_no = (result[0] or 0) + 1
         
-        return f"{prefix}/{financial_year}/{next_no:03d}"
+        return f"{series}{next_no:03d}"
     
     # Purchase operations
     def insert_purchase(self, invoice_no: str, vendor_name: str, vendor_gstin: str,
@@ -198,18 +559,27 @@ class Database:
             INSERT INTO purchases (invoice_no, vendor_name, vendor_gstin, items_json,
                                   subtotal, cgst, sgst, igst, total, date)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (invoice_no, vendor_name, vendor_gstin, json.dumps(items),
+        """, (invoice_no, vendor_name, vendor_gstin, _dumps(items),
               subtotal, cgst, sgst, igst, total, date))
-        self.connection.commit()
         return self.cursor.lastrowid
     
-    def get_purchases(self, limit: Optional[int] = None) -> List[Dict]:
+    def get_purchases(self, limit: Optional[int] = None,
+                      columns: Optional[Sequence[str]] = None) -> List[Dict]:
         """Get all purchase records"""
-        query = "SELECT * FROM purchases ORDER BY date DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        self.cursor.execute(query)
-        return [dict(row) for row in self.cursor.fetchall()]
+        # LIMIT -1 means "no limit" in SQLite, so one statement covers both cases
+        self.cursor.execute(
+            f"SELECT {_projection(columns)} FROM purchases ORDER BY date DESC LIMIT ?",
+            (limit or -1,)
+        )
+        return self._fetch_dicts(columns)
+    
+    def get_purchases_df(self, limit: Optional[int] = None,
+                         columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+        """Get purchase records as a DataFrame for aggregation-heavy callers"""
+        return self._query_df(
+            f"SELECT {_projection(columns)} FROM purchases ORDER BY date DESC LIMIT ?",
+            (limit or -1,), columns
+        )
     
     # Expense operations
     def insert_expense(self, vendor_name: str, amount: float, category: str,
@@ -219,28 +589,130 @@ class Database:
             INSERT INTO expenses (vendor_name, amount, category, description, date, due_date)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (vendor_name, amount, category, description, date, due_date))
-        self.connection.commit()
         return self.cursor.lastrowid
     
-    def get_expenses(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    def insert_expenses_bulk(self, rows: Iterable[Tuple]) -> List[int]:
+        """
+        Insert many expense records in a single transaction
+        
+        Args:
+            rows: Tuples of (vendor_name, amount, category, description, date,
+                  due_date)
+                  
+        Returns:
+            IDs of the inserted rows, in input order
+        """
+        # Drain lazy iterables first so their work never runs under the lock
+        rows = list(rows)
+        self.begin()
+        try:
+            self.cursor.executemany("""
+                INSERT INTO expenses (vendor_name, amount, category, description, date, due_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            count = self.cursor.rowcount
+            # executemany leaves lastrowid unset; the write lock held since
+            # begin() keeps the new rowids consecutive, ending at this one
+            self.cursor.execute("SELECT last_insert_rowid()")
+            last_id = self.cursor.fetchone()[0]
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+        return list(range(last_id - count + 1, last_id + 1)) if count > 0 else []
+    
+    def mark_expenses_tally_synced(self, expense_ids: Iterable[int]) -> None:
+        """Flag the given expenses as posted to Tally"""
+        self.cursor.executemany(
+            "UPDATE expenses SET tally_synced = 1 WHERE id = ?",
+            [(expense_id,) for expense_id in expense_ids]
+        )
+    
+    def get_expenses(self, status: Optional[str] = None, limit: Optional[int] = None,
+                     columns: Optional[Sequence[str]] = None) -> List[Dict]:
         """Get expense records"""
-        query = "SELECT * FROM expenses"
+        query = f"SELECT {_projection(columns)} FROM expenses"
+        params = []
+        
         if status:
-            query += f" WHERE payment_status = '{status}'"
-        query += " ORDER BY date DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        self.cursor.execute(query)
-        return [dict(row) for row in self.cursor.fetchall()]
+            query += " WHERE payment_status = ?"
+            params.append(status)
+        
+        query += " ORDER BY date DESC LIMIT ?"
+        params.append(limit or -1)
+        self.cursor.execute(query, params)
+        return self._fetch_dicts(columns)
+    
+    def get_pending_expenses(self, today_ord: int) -> List[Dict]:
+        """
+        Get pending expenses with days_until_due
+        
+        Args:
+            today_ord: Reference day as date.toordinal()
+            
+        Returns:
+            Expense records ordered by due date; days_until_due is None
+            when the due date is unreadable
+        """
+        self.cursor.execute("""
+            SELECT *, due_date_ord - ? AS days_until_due FROM expenses
+            WHERE payment_status = 'pending'
+            ORDER BY due_date_ord
+        """, (today_ord,))
+        return self._fetch_dicts()
+    
+    def get_overdue_expenses(self, today_ord: int) -> List[Dict]:
+        """
+        Get pending expenses due on or before a day, with days_overdue
+        
+        Args:
+            today_ord: Reference day as date.toordinal()
+            
+        Returns:
+            Expense records ordered by due date
+        """
+        self.cursor.execute("""
+            SELECT *, ?1 - due_date_ord AS days_overdue FROM expenses
+            WHERE payment_status = 'pending' AND due_date_ord <= ?1
+            ORDER BY due_date_ord
+        """, (today_ord,))
+        return self._fetch_dicts()
+    
+    def get_due_between(self, after_ord: int, until_ord: int) -> List[Dict]:
+        """
+        Get pending expenses due after one day and up to another
+        
+        Args:
+            after_ord: Exclusive lower bound as date.toordinal()
+            until_ord: Inclusive upper bound as date.toordinal()
+            
+        Returns:
+            Expense records ordered by due date, with days_until_due
+            counted from after_ord
+        """
+        self.cursor.execute("""
+            SELECT *, due_date_ord - ?1 AS days_until_due FROM expenses
+            WHERE payment_status = 'pending' AND due_date_ord > ?1 AND due_date_ord <= ?2
+            ORDER BY due_date_ord
+        """, (after_ord, until_ord))
+        return self._fetch_dicts()
     
-    def update_expense_payment(self, expense_id: int, payment_date: str) -> None:
-        """Mark expense as paid"""
+    def update_expense_payment(self, expense_id: int, payment_date: str) -> bool:
+        """
+        Mark a pending expense as paid
+        
+        The status check and the update are one statement, so of several
+        concurrent payments of the same expense exactly one succeeds.
+        
+        Returns:
+            False if the expense does not exist or was already paid
+        """
         self.cursor.execute("""
             UPDATE expenses 
             SET payment_status = 'paid', payment_date = ?
-            WHERE id = ?
+            WHERE id = ? AND payment_status = 'pending'
         """, (payment_date, expense_id))
-        self.connection.commit()
+        return self.cursor.rowcount > 0
     
     # Bank transaction operations
     def insert_bank_transaction(self, date: str, description: str, debit: float,
@@ -252,15 +724,43 @@ class Database:
                                           category, tally_voucher_type)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (date, description, debit, credit, balance, category, voucher_type))
-        self.connection.commit()
         return self.cursor.lastrowid
     
-    def get_bank_transactions(self, limit: Optional[int] = None) -> List[Dict]:
+    def insert_bank_transactions_bulk(self, rows: Iterable[Tuple]) -> int:
+        """
+        Insert many bank transactions in a single transaction
+        
+        Args:
+            rows: Tuples of (date, description, debit, credit, balance,
+                  category, voucher_type)
+                  
+        Returns:
+            Number of rows inserted
+        """
+        # Drain lazy iterables first so their work never runs under the lock
+        rows = list(rows)
+        self.begin()
+        try:
+            self.cursor.executemany("""
+                INSERT INTO bank_transactions (date, description, debit, credit, balance,
+                                              category, tally_voucher_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        except Exception:
+            self.rollback()
+            raise
+        count = self.cursor.rowcount
+        self.commit()
+        return count
+    
+    def get_bank_transactions(self, limit: Optional[int] = None,
+                              columns: Optional[Sequence[str]] = None) -> List[Dict]:
         """Get bank transactions"""
-        query = "SELECT * FROM bank_transactions ORDER BY date DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        self.cursor.execute(query)
+        # LIMIT -1 means "no limit" in SQLite, so one statement covers both cases
+        self.cursor.execute(
+            f"SELECT {_projection(columns)} FROM bank_transactions ORDER BY date DESC LIMIT ?",
+            (limit or -1,)
+        )
         return [dict(row) for row in self.cursor.fetchall()]
     
     # TDS operations
@@ -276,7 +776,6 @@ class Database:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (party_name, party_pan, section, payment_amount, tds_rate, tds_amount,
               net_payable, date, quarter, financial_year))
-        self.connection.commit()
         return self.cursor.lastrowid
     
     def get_tds_entries(self, quarter: Optional[str] = None, 
@@ -304,43 +803,139 @@ class Database:
             INSERT INTO creditors (vendor_name, invoice_no, amount, due_date)
             VALUES (?, ?, ?, ?)
         """, (vendor_name, invoice_no, amount, due_date))
-        self.connection.commit()
         return self.cursor.lastrowid
     
     def get_creditors(self, status: Optional[str] = None) -> List[Dict]:
-        """Get creditor records"""
+        """Get creditor records, ordered by due date"""
         query = "SELECT * FROM creditors"
+        params = []
+        
         if status:
-            query += f" WHERE status = '{status}'"
-        query += " ORDER BY due_date ASC"
-        self.cursor.execute(query)
+            query += " WHERE status = ?"
+            params.append(status)
+        
+        query += " ORDER BY due_date_ord"
+        self.cursor.execute(query, params)
+        return self._fetch_dicts()
+    
+    def get_creditor_aging_buckets(self, today: str) -> List[Dict]:
+        """
+        Sum pending creditors per aging bucket
+        
+        Args:
+            today: Reference date (YYYY-MM-DD)
+            
+        Returns:
+            One dict per non-empty bucket with bucket, amount and count
+        """
+        self.cursor.execute(f"""
+            SELECT {_AGING_BUCKET_SQL} AS bucket, TOTAL(amount) AS amount, COUNT(*) AS count
+            FROM (
+                SELECT amount,
+                       CAST(julianday(?) - julianday(due_date_iso) AS INTEGER) AS days_overdue
+                FROM creditors WHERE status = 'pending'
+            )
+            WHERE days_overdue IS NOT NULL
+            GROUP BY bucket
+        """, (today,))
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def get_creditor_totals_by_month(self) -> List[Dict]:
+        """
+        Sum pending creditors per calendar month of their due date
+        
+        Returns:
+            One dict per month with month (YYYY-MM), amount and count;
+            rows with unreadable due dates are left out
+        """
+        self.cursor.execute("""
+            SELECT substr(due_date_iso, 1, 7) AS month,
+                   TOTAL(amount) AS amount, COUNT(*) AS count
+            FROM creditors
+            WHERE status = 'pending' AND julianday(due_date_iso) IS NOT NULL
+            GROUP BY month
+            ORDER BY month
+        """)
         return [dict(row) for row in self.cursor.fetchall()]
     
+    def get_aged_creditors(self, today: str) -> List[Dict]:
+        """
+        Get pending creditors with days_overdue and aging bucket
+        
+        Args:
+            today: Reference date (YYYY-MM-DD)
+            
+        Returns:
+            Creditor records ordered by due date; rows with unreadable
+            due dates are left out
+        """
+        self.cursor.execute(f"""
+            SELECT *, {_AGING_BUCKET_SQL} AS bucket
+            FROM (
+                SELECT *,
+                       CAST(julianday(?) - julianday(due_date_iso) AS INTEGER) AS days_overdue
+                FROM creditors WHERE status = 'pending'
+            )
+            WHERE days_overdue IS NOT NULL
+            ORDER BY due_date_ord
+        """, (today,))
+        return self._fetch_dicts()
+    
     def update_creditor_status(self, creditor_id: int, status: str) -> None:
         """Update creditor payment status"""
         self.cursor.execute("""
             UPDATE creditors SET status = ? WHERE id = ?
         """, (status, creditor_id))
-        self.connection.commit()
+    
+    def _fetch_dicts(self, columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Fetch the executed query's rows as dicts
+        
+        Generated columns picked up by SELECT * are left out unless they
+        were asked for by name in columns.
+        """
+        names = [description[0] for description in self.cursor.description]
+        if columns:
+            return [dict(row) for row in self.cursor.fetchall()]
+        keep = [(i, name) for i, name in enumerate(names) if name not in _GENERATED_COLUMNS]
+        return [{name: row[i] for i, name in keep} for row in self.cursor.fetchall()]
+    
+    def _query_df(self, query: str, params: Sequence = (),
+                  columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+        """
+        Build a DataFrame straight from the cursor, skipping per-row dicts
+        
+        Generated columns are dropped as in _fetch_dicts.
+        """
+        import pandas as pd
+        
+        self.cursor.execute(query, params)
+        names = [description[0] for description in self.cursor.description]
+        df = pd.DataFrame.from_records(self.cursor.fetchall(), columns=names)
+        if not columns:
+            df = df.drop(columns=[name for name in names if name in _GENERATED_COLUMNS])
+        return df
     
     # Settings operations
     def get_setting(self, key: str) -> Optional[str]:
-        """Get a setting value"""
-        self.cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        result = self.cursor.fetchone()
-        return result[0] if result else None
+        """Get a setting value (served from the in-memory settings cache)"""
+        if self._settings_cache is None:
+            self.get_all_settings()
+        return self._settings_cache.get(key)
     
     def set_setting(self, key: str, value: str) -> None:
         """Set a setting value"""
         self.cursor.execute("""
             INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
         """, (key, value))
-        self.connection.commit()
+        if self._settings_cache is not None:
+            self._settings_cache[key] = value
     
     def get_all_settings(self) -> Dict[str, str]:
-        """Get all settings"""
+        """Get all settings and refresh the settings cache"""
         self.cursor.execute("SELECT key, value FROM settings")
-        return {row[0]: row[1] for row in self.cursor.fetchall()}
+        self._settings_cache = {row[0]: row[1] for row in self.cursor.fetchall()}
+        return dict(self._settings_cache)
 
 
 # Global database instance
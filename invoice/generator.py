@@ -3,31 +3,102 @@ PDF invoice generator using reportlab
 Generates professional invoices with GST details
 """
 
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from typing import BinaryIO, List, Dict, Optional, Tuple
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 import config
-from utils.helpers import format_indian_currency, words_to_number
+from utils.helpers import format_indian_currency, format_indian_currency_batch, words_to_number
+
+
+# Page geometry (points)
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = inch
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+# Items table: column widths and the x-origin that centres it on the page
+ITEMS_HEADER = ['#', 'Item Description', 'HSN', 'Qty', 'Unit', 'Rate', 'Amount']
+ITEMS_COL_WIDTHS = [0.4*inch, 2.5*inch, 0.8*inch, 0.6*inch, 0.6*inch, 1.2*inch, 1.2*inch]
+ITEMS_X = (PAGE_WIDTH - sum(ITEMS_COL_WIDTHS)) / 2
+ITEMS_ROW_HEIGHT = 18
+
+# Totals block: label and value columns, right-aligned
+TOTALS_COL_WIDTHS = [5*inch, 1.5*inch]
+TOTALS_X = (PAGE_WIDTH - sum(TOTALS_COL_WIDTHS)) / 2
+TOTALS_ROW_HEIGHT = 16
+
+CELL_PADDING = 6
+
+# Free-text blocks: font, size and line spacing
+REGULAR_FONT = 'Helvetica'
+BOLD_FONT = 'Helvetica-Bold'
+TEXT_SIZE = 10
+TEXT_LEADING = 12
+
+# A text line is a sequence of (font, text) runs drawn left to right
+Line = Tuple[Tuple[str, str], ...]
+BLANK_LINE: Line = ((REGULAR_FONT, ''),)
+
+# Invoice numbers contain '/', which is not allowed in filenames
+_SLASH_TABLE = str.maketrans('/', '_')
 
 
 class InvoiceGenerator:
     """Generate PDF invoices"""
     
-    def __init__(self):
-        """Initialize invoice generator"""
-        self.output_dir = config.INVOICE_OUTPUT_DIR
+    def __init__(self, output_dir: Optional[str] = None):
+        """Initialize invoice generator (output_dir defaults to config.INVOICE_OUTPUT_DIR)"""
+        self.output_dir = output_dir or config.INVOICE_OUTPUT_DIR
         os.makedirs(self.output_dir, exist_ok=True)
+        self._out_prefix = self.output_dir + os.sep
+        
+        # Company, terms and signature blocks are the same on every invoice
+        company_info = config.COMPANY_INFO
+        self._company_lines = (
+            _wrap(company_info['name'], BOLD_FONT)
+            + _wrap(company_info['address'])
+            + _wrap(f"GSTIN: {company_info['gstin']}")
+            + _wrap(f"PAN: {company_info['pan']}")
+            + _wrap(f"Email: {company_info['email']}")
+            + _wrap(f"Phone: {company_info['phone']}")
+        )
+        self._terms_lines = (
+            _wrap("Terms & Conditions:", BOLD_FONT)
+            + _wrap("1. Payment due within 30 days")
+            + _wrap("2. Interest @18% p.a. will be charged on delayed payments")
+            + _wrap("3. Subject to local jurisdiction")
+        )
+        self._signature_lines = (
+            [BLANK_LINE, BLANK_LINE]
+            + _wrap(f"For {company_info['name']}")
+            + [BLANK_LINE, BLANK_LINE]
+            + _wrap("Authorized Signatory")
+        )
+        
+        # Column edges and centres of the items table never change
+        self._items_edges = [ITEMS_X]
+        for width in ITEMS_COL_WIDTHS:
+            self._items_edges.append(self._items_edges[-1] + width)
+        self._items_centres = [
+            (left + right) / 2
+            for left, right in zip(self._items_edges, self._items_edges[1:])
+        ]
     
-    def generate_invoice(self, invoice_data: Dict) -> str:
+    def generate_invoice(self, invoice_data: Dict, out: Optional[BinaryIO] = None) -> str:
         """
         Generate a PDF invoice
         
+        The invoice has a fixed layout, so it is drawn directly on a canvas
+        rather than flowed through Platypus. The items table continues on a
+        new page if it runs past the bottom margin.
+        
         Args:
             invoice_data: Dict with invoice details
                 {
@@ -52,90 +123,76 @@ class InvoiceGenerator:
                     "igst": float,
                     "total": float
                 }
+            out: Optional binary stream to receive the PDF instead of the
+                output directory (e.g. for email attachments or uploads)
         
         Returns:
-            Path to generated PDF file
+            Path to generated PDF file (when out is given, nothing is written
+            to disk and the path only names the document)
         """
         # Generate filename
-        filename = f"{invoice_data['invoice_no'].replace('/', '_')}.pdf"
-        filepath = os.path.join(self.output_dir, filename)
+        filepath = self._out_prefix + invoice_data['invoice_no'].translate(_SLASH_TABLE) + '.pdf'
         
-        # Create PDF
-        pdf = SimpleDocTemplate(filepath, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
+        # Create PDF in memory; it is written out in one go at the end
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=A4)
+        y = PAGE_HEIGHT - MARGIN
         
         # Title
-        title_style = styles['Heading1']
-        title_style.alignment = 1  # Center
-        elements.append(Paragraph("TAX INVOICE", title_style))
-        elements.append(Spacer(1, 0.3*inch))
+        c.setFont('Helvetica-Bold', 18)
+        y -= 22
+        c.drawCentredString(PAGE_WIDTH / 2, y, "TAX INVOICE")
+        y -= 0.3*inch
         
         # Company details
-        company_info = config.COMPANY_INFO
-        company_text = f"""
-        <b>{company_info['name']}</b><br/>
-        {company_info['address']}<br/>
-        GSTIN: {company_info['gstin']}<br/>
-        PAN: {company_info['pan']}<br/>
-        Email: {company_info['email']}<br/>
-        Phone: {company_info['phone']}
-        """
-        elements.append(Paragraph(company_text, styles['Normal']))
-        elements.append(Spacer(1, 0.2*inch))
+        y = self._draw_lines(c, self._company_lines, y) - 0.2*inch
         
-        # Invoice info table
-        info_data = [
-            ['Invoice No:', invoice_data['invoice_no'], 'Date:', invoice_data['invoice_date']],
-        ]
-        info_table = Table(info_data, colWidths=[1.5*inch, 2*inch, 1*inch, 2*inch])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ]))
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.2*inch))
+        # Invoice info row
+        y -= 12
+        c.setFont('Helvetica-Bold', 10)
+        c.drawString(MARGIN, y, 'Invoice No:')
+        c.drawString(MARGIN + 3.5*inch, y, 'Date:')
+        c.setFont('Helvetica', 10)
+        c.drawString(MARGIN + 1.5*inch, y, invoice_data['invoice_no'])
+        c.drawString(MARGIN + 4.5*inch, y, invoice_data['invoice_date'])
+        y -= 0.2*inch
         
         # Customer details
-        customer_text = f"""
-        <b>Bill To:</b><br/>
-        {invoice_data['customer_name']}<br/>
-        {invoice_data.get('customer_address', '')}<br/>
-        GSTIN: {invoice_data.get('customer_gstin', 'N/A')}
-        """
-        elements.append(Paragraph(customer_text, styles['Normal']))
-        elements.append(Spacer(1, 0.2*inch))
+        customer_lines = (
+            _wrap("Bill To:", BOLD_FONT)
+            + _wrap(invoice_data['customer_name'])
+            + _wrap(invoice_data.get('customer_address', ''))
+            + _wrap(f"GSTIN: {invoice_data.get('customer_gstin', 'N/A')}")
+        )
+        y = self._draw_lines(c, customer_lines, y) - 0.2*inch
         
         # Items table
-        items_data = [['#', 'Item Description', 'HSN', 'Qty', 'Unit', 'Rate', 'Amount']]
+        items = invoice_data['items']
+        rates = format_indian_currency_batch([item['rate'] for item in items])
+        amounts = format_indian_currency_batch([item['amount'] for item in items])
         
-        for i, item in enumerate(invoice_data['items'], 1):
-            items_data.append([
+        y = self._draw_items_header(c, y)
+        c.setFont('Helvetica', 9)
+        
+        for i, (item, rate, amount) in enumerate(zip(items, rates, amounts), 1):
+            if y - ITEMS_ROW_HEIGHT < MARGIN:
+                c.showPage()
+                y = self._draw_items_header(c, PAGE_HEIGHT - MARGIN)
+                c.setFont('Helvetica', 9)
+            
+            self._draw_items_row(c, y, [
                 str(i),
                 item['name'],
                 item.get('hsn', ''),
                 str(item['quantity']),
                 item.get('unit', 'Pcs'),
-                format_indian_currency(item['rate']),
-                format_indian_currency(item['amount'])
+                rate,
+                amount
             ])
+            y -= ITEMS_ROW_HEIGHT
+        y -= 0.2*inch
         
-        items_table = Table(items_data, colWidths=[0.4*inch, 2.5*inch, 0.8*inch, 0.6*inch, 0.6*inch, 1.2*inch, 1.2*inch])
-        items_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(items_table)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Totals table
+        # Totals
         totals_data = [
             ['Subtotal:', format_indian_currency(invoice_data['subtotal'])],
         ]
@@ -148,48 +205,95 @@ class InvoiceGenerator:
             totals_data.append(['IGST:', format_indian_currency(invoice_data['igst'])])
         
         totals_data.append(['Total:', format_indian_currency(invoice_data['total'])])
-        
-        totals_table = Table(totals_data, colWidths=[5*inch, 1.5*inch])
-        totals_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(totals_table)
-        elements.append(Spacer(1, 0.2*inch))
+        y = self._draw_totals(c, y, totals_data) - 0.2*inch
         
         # Amount in words
         amount_words = words_to_number(invoice_data['total'])
-        elements.append(Paragraph(f"<b>Amount in words:</b> {amount_words}", styles['Normal']))
-        elements.append(Spacer(1, 0.5*inch))
+        y = self._draw_lines(c, _labelled_lines("Amount in words:", amount_words), y) - 0.5*inch
         
         # Terms & conditions
-        terms_text = """
-        <b>Terms & Conditions:</b><br/>
-        1. Payment due within 30 days<br/>
-        2. Interest @18% p.a. will be charged on delayed payments<br/>
-        3. Subject to local jurisdiction
-        """
-        elements.append(Paragraph(terms_text, styles['Normal']))
-        elements.append(Spacer(1, 0.5*inch))
+        y = self._draw_lines(c, self._terms_lines, y) - 0.5*inch
         
         # Signature
-        signature_text = """
-        <br/><br/>
-        For {}<br/>
-        <br/><br/>
-        Authorized Signatory
-        """.format(company_info['name'])
-        elements.append(Paragraph(signature_text, styles['Normal']))
+        self._draw_lines(c, self._signature_lines, y)
+        
+        # Write PDF
+        c.showPage()
+        c.save()
         
-        # Build PDF
-        pdf.build(elements)
+        if out is not None:
+            out.write(buffer.getbuffer())
+        else:
+            with open(filepath, 'wb') as f:
+                f.write(buffer.getbuffer())
         
         return filepath
     
+    def _draw_lines(self, c: canvas.Canvas, lines: List[Line], y: float) -> float:
+        """Draw a block of text lines with its top at y, returning the new y"""
+        height = len(lines) * TEXT_LEADING
+        if y - height < MARGIN:
+            c.showPage()
+            y = PAGE_HEIGHT - MARGIN
+        
+        baseline = y - TEXT_SIZE
+        for line in lines:
+            x = MARGIN
+            for font, text in line:
+                if text:
+                    c.setFont(font, TEXT_SIZE)
+                    c.drawString(x, baseline, text)
+                    x += stringWidth(text, font, TEXT_SIZE)
+            baseline -= TEXT_LEADING
+        
+        return y - height
+    
+    def _draw_items_header(self, c: canvas.Canvas, y: float) -> float:
+        """Draw the shaded items table header with its top at y, returning the new y"""
+        c.setFillColor(colors.grey)
+        c.rect(ITEMS_X, y - ITEMS_ROW_HEIGHT, sum(ITEMS_COL_WIDTHS), ITEMS_ROW_HEIGHT,
+               stroke=0, fill=1)
+        c.setFillColor(colors.whitesmoke)
+        c.setFont('Helvetica-Bold', 9)
+        self._draw_items_row(c, y, ITEMS_HEADER)
+        c.setFillColor(colors.black)
+        return y - ITEMS_ROW_HEIGHT
+    
+    def _draw_items_row(self, c: canvas.Canvas, y: float, cells: List[str]) -> None:
+        """Draw one gridded row of the items table with its top at y"""
+        bottom = y - ITEMS_ROW_HEIGHT
+        baseline = bottom + (ITEMS_ROW_HEIGHT - 9) / 2 + 2
+        for centre, text in zip(self._items_centres, cells):
+            c.drawCentredString(centre, baseline, text)
+        
+        c.setLineWidth(1)
+        c.line(ITEMS_X, y, self._items_edges[-1], y)
+        c.line(ITEMS_X, bottom, self._items_edges[-1], bottom)
+        for x in self._items_edges:
+            c.line(x, y, x, bottom)
+    
+    def _draw_totals(self, c: canvas.Canvas, y: float, rows: List[List[str]]) -> float:
+        """Draw right-aligned label/value rows with a rule above the last one"""
+        if y - TOTALS_ROW_HEIGHT * len(rows) < MARGIN:
+            c.showPage()
+            y = PAGE_HEIGHT - MARGIN
+        
+        label_x = TOTALS_X + TOTALS_COL_WIDTHS[0] - CELL_PADDING
+        value_x = TOTALS_X + sum(TOTALS_COL_WIDTHS) - CELL_PADDING
+        
+        for i, (label, value) in enumerate(rows):
+            is_last = i == len(rows) - 1
+            if is_last:
+                c.setLineWidth(1)
+                c.line(TOTALS_X, y, TOTALS_X + sum(TOTALS_COL_WIDTHS), y)
+            c.setFont('Helvetica-Bold' if is_last else 'Helvetica', 10)
+            baseline = y - TOTALS_ROW_HEIGHT + 5
+            c.drawRightString(label_x, baseline, label)
+            c.drawRightString(value_x, baseline, value)
+            y -= TOTALS_ROW_HEIGHT
+        
+        return y
+    
     def generate_simple_invoice(self, invoice_no: str, date: str, customer_name: str,
                                items: List[Dict], total: float) -> str:
         """
@@ -220,6 +324,74 @@ class InvoiceGenerator:
         }
         
         return self.generate_invoice(invoice_data)
+    
+    def generate_invoices_bulk(self, invoices: List[Dict],
+                               max_workers: Optional[int] = None) -> List[str]:
+        """
+        Generate PDF invoices for many invoices in parallel
+        
+        PDF layout is CPU-bound Python code, so the work is spread across
+        processes rather than threads. Each worker renders with a copy of
+        this generator, so files land in this generator's output_dir with
+        its company details, whatever the start method. Output paths are
+        derived from the invoice number, so workers never write the same
+        file.
+        
+        Args:
+            invoices: List of invoice_data dicts (see generate_invoice)
+            max_workers: Number of worker processes (default: CPU count)
+            
+        Returns:
+            List of paths to generated PDF files, in input order
+        """
+        if len(invoices) <= 1:
+            return [self.generate_invoice(invoice_data) for invoice_data in invoices]
+        
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_invoice_worker,
+                                 initargs=(self,)) as executor:
+            return list(executor.map(_generate_invoice_worker, invoices, chunksize=8))
+
+
+def _wrap(text: str, font: str = REGULAR_FONT) -> List[Line]:
+    """Split text into lines on newlines and at the content width"""
+    lines = []
+    for part in text.split('\n'):
+        wrapped = simpleSplit(part, font, TEXT_SIZE, CONTENT_WIDTH)
+        lines.extend(((font, line),) for line in wrapped)
+        if not wrapped:
+            lines.append(BLANK_LINE)
+    return lines
+
+
+def _labelled_lines(label: str, text: str) -> List[Line]:
+    """Lay out a bold label followed by wrapped regular text on the same line"""
+    label = label + ' '
+    first_width = CONTENT_WIDTH - stringWidth(label, BOLD_FONT, TEXT_SIZE)
+    words = text.split()
+    
+    first = simpleSplit(text, REGULAR_FONT, TEXT_SIZE, first_width)[:1]
+    rest = ' '.join(words[len(first[0].split()):]) if first else ''
+    
+    lines = [((BOLD_FONT, label), (REGULAR_FONT, first[0] if first else ''))]
+    if rest:
+        lines.extend(_wrap(rest))
+    return lines
+
+
+# The generator a bulk-generation worker renders with, set by its initializer
+_worker_generator: Optional["InvoiceGenerator"] = None
+
+
+def _init_invoice_worker(generator: "InvoiceGenerator") -> None:
+    """Process-pool initializer; keeps the caller's generator for this worker"""
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _generate_invoice_worker(invoice_data: Dict) -> str:
+    """Process-pool entry point; renders with the caller's generator"""
+    return _worker_generator.generate_invoice(invoice_data)
 
 
 # Global instance
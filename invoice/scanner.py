@@ -3,12 +3,276 @@ OCR-based invoice scanner using pytesseract
 Extracts data from invoice images and PDFs
 """
 
+import hashlib
+import io
 import os
 import re
-from typing import Dict, Optional, List
-from PIL import Image
-import pytesseract
-import pdfplumber
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
+import config
+from utils.helpers import parse_amount
+
+try:
+    import re2
+except ImportError:  # google-re2 is optional; fall back to the stdlib engine
+    re2 = None
+
+
+# Field patterns, compiled once at import. Each field lists its alternatives
+# in priority order, with the value captured in a group named v.
+_INVOICE_NO_ALTERNATIVES = (
+    r'invoice\s*(?:no|number|#)[\s:]*(?P<v>[A-Z0-9\-/]+)',
+    r'bill\s*(?:no|number|#)[\s:]*(?P<v>[A-Z0-9\-/]+)',
+    r'ref[\s:]*(?P<v>[A-Z0-9\-/]+)',
+)
+
+_DATE_ALTERNATIVES = (
+    r'date[\s:]*(?P<v>\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+    r'dated[\s:]*(?P<v>\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+    r'(?P<v>\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+)
+
+_TOTAL_ALTERNATIVES = (
+    r'total[\s:]*(?:rs\.?|₹)?[\s]*(?P<v>\d+(?:,\d+)*(?:\.\d{2})?)',
+    r'grand\s*total[\s:]*(?:rs\.?|₹)?[\s]*(?P<v>\d+(?:,\d+)*(?:\.\d{2})?)',
+    r'amount\s*payable[\s:]*(?:rs\.?|₹)?[\s]*(?P<v>\d+(?:,\d+)*(?:\.\d{2})?)',
+)
+
+
+class _FieldPattern:
+    """
+    A field's alternatives, compiled both singly and as one union
+    
+    The union wraps every alternative in a lookahead with its own group
+    (p0, p1, ...), so every position is tried and the text is scanned once;
+    a higher-priority alternative still wins over a lower-priority one that
+    happens to match earlier in the text (see search).
+    """
+    
+    def __init__(self, alternatives: Tuple[str, ...]):
+        self.sources = alternatives
+        self.alternatives = [re.compile(alt, re.IGNORECASE) for alt in alternatives]
+        self.union = re.compile(
+            '(?=' + '|'.join(alt.replace('(?P<v>', f'(?P<p{i}>')
+                             for i, alt in enumerate(alternatives)) + ')',
+            re.IGNORECASE
+        )
+    
+    def search(self, text: str) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Find the first match of the highest-priority alternative
+        
+        Equivalent to searching each alternative separately in priority
+        order, but walks the text once.
+        
+        Returns:
+            (value, index of the alternative that matched), or (None, None)
+        """
+        best = None
+        for match in self.union.finditer(text):
+            if best is None or match.lastgroup < best.lastgroup:
+                best = match
+                if best.lastgroup == 'p0':
+                    break
+        if best is None:
+            return None, None
+        return best.group(best.lastgroup), int(best.lastgroup[1:])
+    
+    def search_alternative(self, text: str, index: int) -> Tuple[Optional[str], Optional[int]]:
+        """Search a single alternative, known to be the highest-priority one present"""
+        match = self.alternatives[index].search(text)
+        return (match.group('v'), index) if match else (None, None)
+
+
+# Fields located by _FieldPattern, in the order _parse_invoice_text fills them
+_FIELD_PATTERNS = {
+    "invoice_no": _FieldPattern(_INVOICE_NO_ALTERNATIVES),
+    "invoice_date": _FieldPattern(_DATE_ALTERNATIVES),
+    "total_amount": _FieldPattern(_TOTAL_ALTERNATIVES),
+}
+
+_GSTIN_RE = re.compile(r'\b\d{2}[A-Z]{5}\d{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}\b')
+
+
+def _compile_field_set():
+    """
+    Build an RE2 Set of every field alternative plus the GSTIN pattern
+    
+    One pass of the Set over the text reports which alternatives occur, so
+    only the capturing regex of each field's winning alternative then runs.
+    
+    Returns:
+        (compiled Set, {set id: (field, alternative index)}), or (None, {})
+        when RE2 is not installed
+    """
+    if re2 is None:
+        return None, {}
+    
+    field_set = re2.Set.SearchSet()
+    ids = {}
+    for field, pattern in _FIELD_PATTERNS.items():
+        for index, source in enumerate(pattern.sources):
+            ids[field_set.Add('(?i)' + source)] = (field, index)
+    ids[field_set.Add(_GSTIN_RE.pattern)] = ("gstin", 0)
+    field_set.Compile()
+    return field_set, ids
+
+
+_FIELD_SET, _FIELD_SET_IDS = _compile_field_set()
+
+
+def _probe_fields(text: str) -> Dict[str, int]:
+    """Map each field present in text to its highest-priority matching alternative"""
+    present = {}
+    for set_id in _FIELD_SET.Match(text) or ():
+        field, index = _FIELD_SET_IDS[set_id]
+        if index < present.get(field, index + 1):
+            present[field] = index
+    return present
+
+
+def _compile_linear(pattern: str):
+    """
+    Compile a case-insensitive pattern with RE2 when available
+    
+    RE2 runs in linear time, so noisy OCR text cannot trigger catastrophic
+    backtracking. Only for patterns RE2 supports (no lookaround).
+    """
+    if re2 is not None:
+        options = re2.Options()
+        options.case_sensitive = False
+        return re2.compile(pattern, options)
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# Lines containing these are labels, not the vendor name
+_VENDOR_SKIP_KEYWORDS = ('invoice', 'bill', 'date', 'gstin')
+
+# Line items: item name qty rate amount
+_ITEM_RE = _compile_linear(
+    r'([A-Za-z\s]+?)\s+(\d+)\s+(?:rs\.?|₹)?\s*(\d+(?:\.\d{2})?)\s+(?:rs\.?|₹)?\s*(\d+(?:\.\d{2})?)'
+)
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp')
+
+# Tesseract ends each page of output with a form feed
+_PAGE_SEPARATOR = '\x0c'
+
+# PDFs with fewer pages are read in-process, and each worker gets at least
+# _PAGES_PER_WORKER pages. Text extraction costs ~35-55 ms a page, while
+# forking a worker from a warm Streamlit server costs ~100 ms or more, so
+# only statements of a couple of seconds' work are worth spreading out
+_PARALLEL_MIN_PAGES = 16
+_PAGES_PER_WORKER = 8
+
+# Pages held open at once when a PDF is read in-process
+_PDF_PAGE_CHUNK = 50
+
+
+def _page_text(page) -> str:
+    """
+    Extract a pdfplumber page's text
+    
+    pdfplumber rebuilds lines and word spacing from character positions.
+    pdfminer's own extract_text is no faster with layout analysis on and
+    loses all spacing with it off, which the field regexes depend on.
+    """
+    return page.extract_text() or ""
+
+
+def _page_tables(page) -> List:
+    """Extract a pdfplumber page's tables"""
+    return page.extract_tables()
+
+
+def _extract_pages(pages, extractor: Callable) -> Iterator:
+    """Run an extractor over pdfplumber pages, releasing each page's caches"""
+    for page in pages:
+        yield extractor(page)
+        page.close()
+
+
+def _extract_page_range(pdf_path: str, first: int, last: int, extractor: Callable) -> Iterator:
+    """Run an extractor over pages first..last, opening _PDF_PAGE_CHUNK at a time"""
+    import pdfplumber
+    
+    for start in range(first, last + 1, _PDF_PAGE_CHUNK):
+        pages = list(range(start, min(start + _PDF_PAGE_CHUNK, last + 1)))
+        with pdfplumber.open(pdf_path, pages=pages) as pdf:
+            yield from _extract_pages(pdf.pages, extractor)
+
+
+def _extract_page_range_job(job: Tuple[str, int, int, Callable]) -> List:
+    """Process-pool entry point: run an extractor over a contiguous page range"""
+    return list(_extract_page_range(*job))
+
+
+def _parallel_workers(page_count: int) -> int:
+    """Worker processes worth starting for a PDF (below 2 means read in-process)"""
+    if page_count < _PARALLEL_MIN_PAGES:
+        return 0
+    return min(os.cpu_count() or 1, page_count // _PAGES_PER_WORKER)
+
+
+def _iter_pdf_pages(pdf_path: str, extractor: Callable,
+                    allow_parallel: bool = True) -> Iterator:
+    """
+    Run an extractor over every page of a PDF, yielding results in page order
+    
+    Page extraction is CPU-bound and independent per page, so long
+    documents are split into contiguous page ranges, one per process,
+    unless allow_parallel is off. This process reads the first range from
+    the document it opened to count the pages, and workers each open theirs
+    once. Ranges longer than _PDF_PAGE_CHUNK pages are reopened a chunk at
+    a time and each page's cached layout objects are released once
+    extracted, so memory stays flat on statements with hundreds of pages.
+    """
+    import pdfplumber
+    
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        workers = _parallel_workers(page_count) if allow_parallel else 0
+        size = -(-page_count // workers) if workers >= 2 else page_count
+        
+        executor = None
+        futures = []
+        if size < page_count:
+            jobs = [(pdf_path, start, min(start + size - 1, page_count), extractor)
+                    for start in range(size + 1, page_count + 1, size)]
+            executor = ProcessPoolExecutor(len(jobs))
+            futures = [executor.submit(_extract_page_range_job, job) for job in jobs]
+        
+        try:
+            yield from _extract_pages(pdf.pages[:min(size, _PDF_PAGE_CHUNK)], extractor)
+            if size > _PDF_PAGE_CHUNK:
+                yield from _extract_page_range(pdf_path, _PDF_PAGE_CHUNK + 1, size, extractor)
+            for future in futures:
+                yield from future.result()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+
+def _pdf_text(pdf_path: str, allow_parallel: bool = True) -> str:
+    """Extract the text of every page of a PDF"""
+    return "".join(
+        page_text + "\n"
+        for page_text in _iter_pdf_pages(pdf_path, _page_text, allow_parallel)
+        if page_text
+    )
+
+
+def _extract_pdf_text(pdf_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Process-pool entry point: a PDF's text, or the error that stopped it"""
+    try:
+        # Already in a worker; pages are read in-process
+        return _pdf_text(pdf_path, allow_parallel=False), None
+    except Exception as e:
+        return None, str(e)
 
 
 class InvoiceScanner:
@@ -16,12 +280,22 @@ class InvoiceScanner:
     
     def __init__(self):
         """Initialize invoice scanner"""
-        pass
+        # Raw OCR text keyed by SHA-256 of the image bytes: a small in-memory
+        # LRU in front of one text file per image on disk. Text rather than
+        # parsed results is cached, so parser changes apply to cached images
+        self._ocr_cache_dir = config.OCR_CACHE_DIR
+        self._ocr_memory_cache: OrderedDict = OrderedDict()
+        # The scanner is shared by Streamlit's threads; the LRU's reorders
+        # and evictions must not interleave
+        self._ocr_cache_lock = threading.Lock()
     
     def scan_image(self, image_path: str) -> Dict:
         """
         Extract text from invoice image using OCR
         
+        OCR text is cached by image content, so rescanning the same file
+        (duplicate uploads, re-imports) skips OCR.
+        
         Args:
             image_path: Path to invoice image
             
@@ -29,11 +303,22 @@ class InvoiceScanner:
             Dict with extracted invoice data
         """
         try:
-            # Open image
-            image = Image.open(image_path)
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
             
-            # Perform OCR
-            text = pytesseract.image_to_string(image)
+            digest = hashlib.sha256(image_bytes).hexdigest()
+            text = self._get_cached_ocr(digest)
+            if text is None:
+                # OCR libraries are imported on first use to keep start-up light
+                import pytesseract
+                from PIL import Image
+                
+                # Open image
+                image = Image.open(io.BytesIO(image_bytes))
+                
+                # Perform OCR
+                text = pytesseract.image_to_string(image)
+                self._cache_ocr(digest, text)
             
             # Parse extracted text
             return self._parse_invoice_text(text)
@@ -43,6 +328,59 @@ class InvoiceScanner:
                 "raw_text": ""
             }
     
+    def _get_cached_ocr(self, digest: str) -> Optional[str]:
+        """Look up an image's OCR text in memory, then on disk"""
+        with self._ocr_cache_lock:
+            text = self._ocr_memory_cache.get(digest)
+            if text is not None:
+                self._ocr_memory_cache.move_to_end(digest)
+                return text
+        
+        cache_path = os.path.join(self._ocr_cache_dir, f"{digest}.txt")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(cache_path)  # Mark as recently used for eviction
+        except OSError:
+            return None
+        self._remember_ocr(digest, text)
+        return text
+    
+    def _cache_ocr(self, digest: str, text: str) -> None:
+        """Store an image's OCR text in memory and on disk"""
+        self._remember_ocr(digest, text)
+        try:
+            os.makedirs(self._ocr_cache_dir, exist_ok=True)
+            with open(os.path.join(self._ocr_cache_dir, f"{digest}.txt"), 'w',
+                      encoding='utf-8') as f:
+                f.write(text)
+            self._evict_disk_cache()
+        except OSError:
+            pass  # The disk cache is only a speed-up; keep the text in memory
+    
+    def _evict_disk_cache(self) -> None:
+        """Delete the least recently used cache files beyond OCR_DISK_CACHE_SIZE"""
+        with os.scandir(self._ocr_cache_dir) as entries:
+            files = [entry for entry in entries
+                     if entry.name.endswith('.txt') and entry.is_file()]
+        excess = len(files) - config.OCR_DISK_CACHE_SIZE
+        if excess <= 0:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    
+    def _remember_ocr(self, digest: str, text: str) -> None:
+        """Add OCR text to the in-memory LRU, evicting the oldest entry if full"""
+        with self._ocr_cache_lock:
+            self._ocr_memory_cache[digest] = text
+            self._ocr_memory_cache.move_to_end(digest)
+            if len(self._ocr_memory_cache) > config.OCR_MEMORY_CACHE_SIZE:
+                self._ocr_memory_cache.popitem(last=False)
+    
     def scan_pdf(self, pdf_path: str) -> Dict:
         """
         Extract text from invoice PDF
@@ -54,14 +392,8 @@ class InvoiceScanner:
             Dict with extracted invoice data
         """
         try:
-            text = ""
-            
             # Extract text from PDF
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            text = _pdf_text(pdf_path)
             
             # Parse extracted text
             return self._parse_invoice_text(text)
@@ -85,7 +417,7 @@ class InvoiceScanner:
         
         if ext == '.pdf':
             return self.scan_pdf(file_path)
-        elif ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+        elif ext in IMAGE_EXTENSIONS:
             return self.scan_image(file_path)
         else:
             return {
@@ -93,6 +425,157 @@ class InvoiceScanner:
                 "raw_text": ""
             }
     
+    def scan_images(self, image_paths: List[str]) -> List[Dict]:
+        """
+        Extract invoice data from many images with a single Tesseract run
+        
+        Images already in the OCR cache are not OCRed again. Tesseract
+        accepts a text file listing image paths and OCRs them all in one
+        process, so the remaining images share a single start-up cost, and
+        their text is added to the cache.
+        
+        Args:
+            image_paths: Paths to invoice images
+            
+        Returns:
+            List of dicts with extracted invoice data, in input order
+        """
+        texts: List[Optional[str]] = [None] * len(image_paths)
+        misses = []
+        unreadable = []
+        for index, path in enumerate(image_paths):
+            try:
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                unreadable.append(index)
+                continue
+            texts[index] = self._get_cached_ocr(digest)
+            if texts[index] is None:
+                misses.append((index, digest))
+        
+        if len(misses) > 1:
+            pages = self._ocr_batch([image_paths[index] for index, _ in misses])
+            if pages is not None:
+                for (index, digest), page in zip(misses, pages):
+                    self._cache_ocr(digest, page)
+                    texts[index] = page
+                misses = []
+        
+        results = [self._parse_invoice_text(text) if text is not None else None
+                   for text in texts]
+        # Unreadable files, a single miss or a failed batch take the
+        # one-image path, which caches its text and reports its own errors
+        for index in unreadable + [index for index, _ in misses]:
+            results[index] = self.scan_image(image_paths[index])
+        return results
+    
+    def _ocr_batch(self, image_paths: List[str]) -> Optional[List[str]]:
+        """
+        OCR several images in one Tesseract run
+        
+        Returns:
+            One text per image, in input order, or None when the output
+            cannot be split back into images (e.g. multi-page TIFFs) or
+            Tesseract failed
+        """
+        try:
+            import pytesseract
+            
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+                f.write('\n'.join(os.path.abspath(path) for path in image_paths))
+                list_path = f.name
+            try:
+                text = pytesseract.image_to_string(list_path)
+            finally:
+                os.remove(list_path)
+        except Exception:
+            return None
+        
+        pages = text.split(_PAGE_SEPARATOR)
+        if pages and not pages[-1].strip():
+            pages.pop()
+        return pages if len(pages) == len(image_paths) else None
+    
+    def scan_pdfs(self, pdf_paths: List[str]) -> List[Dict]:
+        """
+        Extract invoice data from many PDFs, reading them in parallel
+        
+        Text extraction is CPU-bound and independent per file, so it is
+        spread across worker processes; parsing stays in this process.
+        
+        Args:
+            pdf_paths: Paths to invoice PDFs
+            
+        Returns:
+            List of dicts with extracted invoice data, in input order
+        """
+        if len(pdf_paths) <= 1 or (os.cpu_count() or 1) < 2:
+            return [self.scan_pdf(path) for path in pdf_paths]
+        
+        results = []
+        with ProcessPoolExecutor() as executor:
+            for text, error in executor.map(_extract_pdf_text, pdf_paths):
+                if error is not None:
+                    results.append({"error": f"Failed to scan PDF: {error}", "raw_text": ""})
+                else:
+                    results.append(self._parse_invoice_text(text))
+        return results
+    
+    def scan_directory(self, directory: str) -> Dict[str, Dict]:
+        """
+        Extract invoice data from every supported file in a directory
+        
+        Images are OCRed together in one batch (see scan_images) and PDFs
+        are read in parallel (see scan_pdfs).
+        
+        Args:
+            directory: Path to a directory of invoice files
+            
+        Returns:
+            Dict mapping file path to extracted invoice data
+        """
+        file_paths = [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if os.path.isfile(os.path.join(directory, name))
+        ]
+        return dict(zip(file_paths, self.scan_files(file_paths)))
+    
+    def scan_files(self, file_paths: List[str]) -> List[Dict]:
+        """
+        Extract invoice data from many files of mixed type
+        
+        Images are OCRed together in one batch (see scan_images) and PDFs
+        are read in parallel (see scan_pdfs).
+        
+        Args:
+            file_paths: Paths to invoice files
+            
+        Returns:
+            List of dicts with extracted invoice data, in input order
+        """
+        results: List[Optional[Dict]] = [None] * len(file_paths)
+        image_indexes = []
+        pdf_indexes = []
+        
+        for index, file_path in enumerate(file_paths):
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                image_indexes.append(index)
+            elif ext == '.pdf':
+                pdf_indexes.append(index)
+            else:
+                results[index] = self.scan_file(file_path)
+        
+        for indexes, scan in ((image_indexes, self.scan_images),
+                              (pdf_indexes, self.scan_pdfs)):
+            batch = scan([file_paths[index] for index in indexes])
+            for index, result in zip(indexes, batch):
+                results[index] = result
+        
+        return results
+    
     def _parse_invoice_text(self, text: str) -> Dict:
         """
         Parse invoice text and extract structured data
@@ -119,64 +602,40 @@ class InvoiceScanner:
             # Try to find company name (often the first non-empty line)
             for line in lines[:10]:
                 line = line.strip()
-                if len(line) > 3 and not any(kw in line.lower() for kw in ['invoice', 'bill', 'date', 'gstin']):
-                    if not result["vendor_name"]:
-                        result["vendor_name"] = line
-                        break
-        
-        # Extract invoice number
-        invoice_patterns = [
-            r'invoice\s*(?:no|number|#)[\s:]*([A-Z0-9\-/]+)',
-            r'bill\s*(?:no|number|#)[\s:]*([A-Z0-9\-/]+)',
-            r'ref[\s:]*([A-Z0-9\-/]+)'
-        ]
-        
-        for pattern in invoice_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result["invoice_no"] = match.group(1).strip()
-                break
-        
-        # Extract date
-        date_patterns = [
-            r'date[\s:]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
-            r'dated[\s:]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
-            r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'
-        ]
+                if len(line) <= 3:
+                    continue
+                line_lower = line.lower()
+                if not any(kw in line_lower for kw in _VENDOR_SKIP_KEYWORDS):
+                    result["vendor_name"] = line
+                    break
         
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result["invoice_date"] = match.group(1).strip()
-                break
+        # Invoice number, date and total. With RE2, one Set pass finds which
+        # alternatives occur, so only each field's winning one is run
+        present = _probe_fields(text) if _FIELD_SET is not None else None
+        for field, pattern in _FIELD_PATTERNS.items():
+            value = None
+            if present is not None:
+                if field not in present:
+                    continue
+                value, _ = pattern.search_alternative(text, present[field])
+            if value is None:
+                value, _ = pattern.search(text)
+            if value is None:
+                continue
+            
+            if field == "total_amount":
+                result[field] = float(value.replace(',', ''))
+            else:
+                result[field] = value.strip()
         
         # Extract GSTIN
-        gstin_pattern = r'\b\d{2}[A-Z]{5}\d{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}\b'
-        match = re.search(gstin_pattern, text)
-        if match:
-            result["gstin"] = match.group(0)
-        
-        # Extract total amount
-        total_patterns = [
-            r'total[\s:]*(?:rs\.?|₹)?[\s]*(\d+(?:,\d+)*(?:\.\d{2})?)',
-            r'grand\s*total[\s:]*(?:rs\.?|₹)?[\s]*(\d+(?:,\d+)*(?:\.\d{2})?)',
-            r'amount\s*payable[\s:]*(?:rs\.?|₹)?[\s]*(\d+(?:,\d+)*(?:\.\d{2})?)'
-        ]
-        
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        if present is None or "gstin" in present:
+            match = _GSTIN_RE.search(text)
             if match:
-                amount_str = match.group(1).replace(',', '')
-                try:
-                    result["total_amount"] = float(amount_str)
-                    break
-                except:
-                    pass
+                result["gstin"] = match.group(0)
         
         # Try to extract line items (simplified)
-        # Look for patterns like: item name qty rate amount
-        item_pattern = r'([A-Za-z\s]+?)\s+(\d+)\s+(?:rs\.?|₹)?\s*(\d+(?:\.\d{2})?)\s+(?:rs\.?|₹)?\s*(\d+(?:\.\d{2})?)'
-        matches = re.findall(item_pattern, text, re.IGNORECASE)
+        matches = _ITEM_RE.findall(text)
         
         for match in matches:
             try:
@@ -191,64 +650,40 @@ class InvoiceScanner:
         
         return result
     
-    def extract_bank_statement_data(self, file_path: str) -> List[Dict]:
+    def extract_bank_statement_data(self, file_path: str) -> Iterator[Dict]:
         """
         Extract transaction data from bank statement PDF
         
+        Transactions are yielded as their pages are parsed, so callers
+        need not hold the whole statement. A PDF that cannot be read raises
+        instead of ending the iteration early, so a failure partway through
+        is never mistaken for the end of the statement.
+        
         Args:
             file_path: Path to bank statement PDF
             
-        Returns:
-            List of transaction dicts
+        Yields:
+            Transaction dicts, in statement order
         """
-        try:
-            transactions = []
-            
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    # Try to extract table
-                    tables = page.extract_tables()
-                    
-                    for table in tables:
-                        for row in table:
-                            if row and len(row) >= 4:
-                                # Try to parse transaction row
-                                try:
-                                    # Common bank statement format: Date, Description, Debit, Credit, Balance
-                                    transaction = {
-                                        "date": row[0] if row[0] else "",
-                                        "description": row[1] if len(row) > 1 and row[1] else "",
-                                        "debit": self._parse_amount(row[2]) if len(row) > 2 else 0,
-                                        "credit": self._parse_amount(row[3]) if len(row) > 3 else 0,
-                                        "balance": self._parse_amount(row[4]) if len(row) > 4 else 0
-                                    }
-                                    
-                                    if transaction["date"] and (transaction["debit"] > 0 or transaction["credit"] > 0):
-                                        transactions.append(transaction)
-                                except:
-                                    pass
-            
-            return transactions
-        except Exception as e:
-            return []
-    
-    def _parse_amount(self, amount_str: str) -> float:
-        """Parse amount string to float"""
-        try:
-            if not amount_str or amount_str.strip() == "":
-                return 0.0
-            
-            # Remove currency symbols and commas
-            amount_str = str(amount_str).replace('₹', '').replace('Rs', '').replace(',', '').strip()
-            
-            # Handle negative amounts in parentheses
-            if amount_str.startswith('(') and amount_str.endswith(')'):
-                amount_str = '-' + amount_str[1:-1]
-            
-            return float(amount_str)
-        except:
-            return 0.0
-
+        for tables in _iter_pdf_pages(file_path, _page_tables):
+            for table in tables:
+                for row in table:
+                    if row and len(row) >= 4:
+                        # Try to parse transaction row
+                        try:
+                            # Common bank statement format: Date, Description, Debit, Credit, Balance
+                            transaction = {
+                                "date": row[0] if row[0] else "",
+                                "description": row[1] if len(row) > 1 and row[1] else "",
+                                "debit": parse_amount(row[2]) if len(row) > 2 else 0,
+                                "credit": parse_amount(row[3]) if len(row) > 3 else 0,
+                                "balance": parse_amount(row[4]) if len(row) > 4 else 0
+                            }
+                        except:
+                            continue
+                        
+                        if transaction["date"] and (transaction["debit"] > 0 or transaction["credit"] > 0):
+                            yield transaction
 
 # Global instance
 invoice_scanner = InvoiceScanner()
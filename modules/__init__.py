@@ -1,26 +1,41 @@
-"""Modules package for AI Accounting Chatbot"""
-
-from modules.sales import sales_module, SalesModule
-from modules.purchase import purchase_module, PurchaseModule
-from modules.expenses import expense_module, ExpenseModule
-from modules.bank_statement import bank_statement_module, BankStatementModule
-from modules.tds import tds_module, TDSModule
-from modules.gst import gst_module, GSTModule
-from modules.reports import reports_module, ReportsModule
-
-__all__ = [
-    'sales_module',
-    'SalesModule',
-    'purchase_module',
-    'PurchaseModule',
-    'expense_module',
-    'ExpenseModule',
-    'bank_statement_module',
-    'BankStatementModule',
-    'tds_module',
-    'TDSModule',
-    'gst_module',
-    'GSTModule',
-    'reports_module',
-    'ReportsModule',
-]
+"""Modules package for AI Accounting Chatbot
+
+Submodules are imported on first attribute access (PEP 562), so importing
+the package does not pull in OCR, PDF and reporting dependencies up front.
+"""
+
+import importlib
+
+# Exported name -> submodule that defines it
+_EXPORTS = {
+    'sales_module': 'sales',
+    'SalesModule': 'sales',
+    'purchase_module': 'purchase',
+    'PurchaseModule': 'purchase',
+    'expense_module': 'expenses',
+    'ExpenseModule': 'expenses',
+    'bank_statement_module': 'bank_statement',
+    'BankStatementModule': 'bank_statement',
+    'tds_module': 'tds',
+    'TDSModule': 'tds',
+    'gst_module': 'gst',
+    'GSTModule': 'gst',
+    'reports_module': 'reports',
+    'ReportsModule': 'reports',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import the submodule defining name and cache the attribute"""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -8,6 +8,11 @@ from typing import Dict, List, Optional
 import csv
 import json
 
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to substring scans
+    ahocorasick = None
+
 from database.db import db
 from tally.voucher import tally_voucher
 from invoice.scanner import invoice_scanner
@@ -15,11 +20,50 @@ from utils.constants import BANK_KEYWORDS
 from utils.helpers import (
     format_indian_currency,
     format_date_indian,
+    parse_amount,
+    parse_amount_series,
     parse_date
 )
 import config
 
 
+# Read buffer for CSV statement imports
+_CSV_BUFFER_SIZE = 1 << 20
+
+# Rows per pandas chunk in import_from_csv_fast
+_CSV_CHUNK_SIZE = 50_000
+
+# Classification result per BANK_KEYWORDS group, in priority order
+_CLASSIFICATIONS = [
+    ("sales_receipt", ("Sales Receipt", "Receipt")),
+    ("payment", ("Payment", "Payment")),
+    ("bank_charges", ("Bank Charges", "Payment")),
+    ("interest", ("Interest Income", "Receipt")),
+    ("salary", ("Salary Payment", "Payment")),
+]
+
+# (lowercased keywords, result) per group, for the substring fallback
+_KEYWORD_GROUPS = [
+    ([keyword.lower() for keyword in BANK_KEYWORDS[group]], result)
+    for group, result in _CLASSIFICATIONS
+]
+
+
+def _build_keyword_automaton():
+    """Build one Aho-Corasick automaton mapping every keyword to its group priority"""
+    automaton = ahocorasick.Automaton()
+    for priority, (keywords, _) in enumerate(_KEYWORD_GROUPS):
+        for keyword in keywords:
+            if keyword not in automaton:
+                automaton.add_word(keyword, priority)
+    automaton.make_automaton()
+    return automaton
+
+
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
 class BankStatementModule:
     """Manager for bank statement import and classification"""
     
@@ -40,15 +84,12 @@ class BankStatementModule:
             Dict with import status and transactions
         """
         try:
-            # Extract transactions using OCR
-            transactions = self.scanner.extract_bank_statement_data(file_path)
-            
-            if not transactions:
-                return {"error": "No transactions found in PDF"}
-            
-            # Process and classify transactions
-            imported_count = 0
-            for txn in transactions:
+            # Parse and classify the whole statement before touching the
+            # database, so the write lock is held only for the insert and a
+            # statement that fails partway through imports nothing
+            transactions = []
+            rows = []
+            for txn in self.scanner.extract_bank_statement_data(file_path):
                 if auto_classify:
                     category, voucher_type = self._classify_transaction(txn['description'])
                     txn['category'] = category
@@ -57,20 +98,14 @@ class BankStatementModule:
                     txn['category'] = "Uncategorized"
                     txn['voucher_type'] = "Journal"
                 
-                # Save to database
-                try:
-                    self.db.insert_bank_transaction(
-                        date=txn['date'],
-                        description=txn['description'],
-                        debit=txn['debit'],
-                        credit=txn['credit'],
-                        balance=txn['balance'],
-                        category=txn['category'],
-                        voucher_type=txn['voucher_type']
-                    )
-                    imported_count += 1
-                except Exception:
-                    pass  # Skip duplicates
+                transactions.append(txn)
+                rows.append((txn['date'], txn['description'], txn['debit'], txn['credit'],
+                             txn['balance'], txn['category'], txn['voucher_type']))
+            
+            if not transactions:
+                return {"error": "No transactions found in PDF"}
+            
+            imported_count = self.db.insert_bank_transactions_bulk(rows)
             
             return {
                 "success": True,
@@ -105,18 +140,33 @@ class BankStatementModule:
         """
         try:
             transactions = []
-            imported_count = 0
+            rows = []
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
+            with open(file_path, 'r', encoding='utf-8', buffering=_CSV_BUFFER_SIZE) as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                
+                # Resolve column positions once; absent columns point one past
+                # the header so rows padded with "" read them as empty
+                index = {name: i for i, name in enumerate(header)}
+                missing = len(header)
+                date_i, desc_i, debit_i, credit_i, balance_i = (
+                    index.get(column, missing)
+                    for column in (date_column, description_column, debit_column,
+                                   credit_column, balance_column)
+                )
+                width = max(date_i, desc_i, debit_i, credit_i, balance_i) + 1
                 
                 for row in reader:
                     try:
-                        date_str = row.get(date_column, "")
-                        description = row.get(description_column, "")
-                        debit = self._parse_amount(row.get(debit_column, "0"))
-                        credit = self._parse_amount(row.get(credit_column, "0"))
-                        balance = self._parse_amount(row.get(balance_column, "0"))
+                        if len(row) < width:
+                            row += [""] * (width - len(row))
+                        
+                        date_str = row[date_i]
+                        description = row[desc_i]
+                        debit = parse_amount(row[debit_i])
+                        credit = parse_amount(row[credit_i])
+                        balance = parse_amount(row[balance_i])
                         
                         if not date_str or not description:
                             continue
@@ -128,16 +178,8 @@ class BankStatementModule:
                             category = "Uncategorized"
                             voucher_type = "Journal"
                         
-                        # Save to database
-                        self.db.insert_bank_transaction(
-                            date=date_str,
-                            description=description,
-                            debit=debit,
-                            credit=credit,
-                            balance=balance,
-                            category=category,
-                            voucher_type=voucher_type
-                        )
+                        rows.append((date_str, description, debit, credit, balance,
+                                     category, voucher_type))
                         
                         transactions.append({
                             "date": date_str,
@@ -147,11 +189,12 @@ class BankStatementModule:
                             "balance": balance,
                             "category": category
                         })
-                        
-                        imported_count += 1
                     except Exception:
                         pass  # Skip invalid rows
             
+            # Save to database in one transaction
+            imported_count = self.db.insert_bank_transactions_bulk(rows)
+            
             return {
                 "success": True,
                 "imported_count": imported_count,
@@ -161,6 +204,74 @@ class BankStatementModule:
         except Exception as e:
             return {"error": f"Failed to import from CSV: {str(e)}"}
     
+    def import_from_csv_fast(self, file_path: str, auto_classify: bool = True,
+                            date_column: str = "Date",
+                            description_column: str = "Description",
+                            debit_column: str = "Debit",
+                            credit_column: str = "Credit",
+                            balance_column: str = "Balance") -> Dict:
+        """
+        Import a large CSV bank statement using vectorized pandas parsing
+        
+        Behaves like import_from_csv but reads the file in chunks and parses
+        amounts column-wise. The imported rows are not echoed back.
+        
+        Args:
+            file_path: Path to CSV file
+            auto_classify: Automatically classify transactions
+            date_column: Name of date column
+            description_column: Name of description column
+            debit_column: Name of debit column
+            credit_column: Name of credit column
+            balance_column: Name of balance column
+            
+        Returns:
+            Dict with import status
+        """
+        import pandas as pd
+        
+        try:
+            columns = [date_column, description_column, debit_column,
+                       credit_column, balance_column]
+            wanted = set(columns)
+            imported_count = 0
+            
+            chunks = pd.read_csv(file_path, dtype=str, keep_default_na=False,
+                                 encoding='utf-8', usecols=lambda c: c in wanted,
+                                 chunksize=_CSV_CHUNK_SIZE)
+            for df in chunks:
+                df = df.reindex(columns=columns, fill_value="").fillna("")
+                df = df[(df[date_column] != "") & (df[description_column] != "")]
+                if df.empty:
+                    continue
+                
+                for column in (debit_column, credit_column, balance_column):
+                    df[column] = parse_amount_series(df[column])
+                
+                descriptions = df[description_column]
+                if auto_classify:
+                    results = descriptions.map(self._classify_transaction)
+                else:
+                    results = pd.Series([("Uncategorized", "Journal")] * len(df),
+                                        index=df.index)
+                
+                rows = zip(df[date_column], descriptions,
+                           df[debit_column].tolist(), df[credit_column].tolist(),
+                           df[balance_column].tolist(),
+                           (category for category, _ in results),
+                           (voucher_type for _, voucher_type in results))
+                imported_count += self.db.insert_bank_transactions_bulk(rows)
+            
+            return {
+                "success": True,
+                "imported_count": imported_count
+            }
+            
+        except pd.errors.EmptyDataError:
+            return {"success": True, "imported_count": 0}
+        except Exception as e:
+            return {"error": f"Failed to import from CSV: {str(e)}"}
+    
     def _classify_transaction(self, description: str) -> tuple:
         """
         Automatically classify transaction based on description
@@ -173,50 +284,28 @@ class BankStatementModule:
         """
         description_lower = description.lower()
         
-        # Check for sales receipts
-        for keyword in BANK_KEYWORDS['sales_receipt']:
-            if keyword.lower() in description_lower:
-                return ("Sales Receipt", "Receipt")
-        
-        # Check for payments
-        for keyword in BANK_KEYWORDS['payment']:
-            if keyword.lower() in description_lower:
-                return ("Payment", "Payment")
-        
-        # Check for bank charges
-        for keyword in BANK_KEYWORDS['bank_charges']:
-            if keyword.lower() in description_lower:
-                return ("Bank Charges", "Payment")
+        if ahocorasick is not None:
+            # One pass for all keywords; the earliest group in priority order
+            # wins, wherever its keyword appears in the description
+            best = None
+            for _, priority in _KEYWORD_AUTOMATON.iter(description_lower):
+                if best is None or priority < best:
+                    best = priority
+                    if best == 0:
+                        break
+            if best is not None:
+                return _KEYWORD_GROUPS[best][1]
+            return ("Uncategorized", "Journal")
         
-        # Check for interest
-        for keyword in BANK_KEYWORDS['interest']:
-            if keyword.lower() in description_lower:
-                return ("Interest Income", "Receipt")
-        
-        # Check for salary
-        for keyword in BANK_KEYWORDS['salary']:
-            if keyword.lower() in description_lower:
-                return ("Salary Payment", "Payment")
+        # Check each group in priority order: sales receipts, payments,
+        # bank charges, interest, salary
+        for keywords, result in _KEYWORD_GROUPS:
+            for keyword in keywords:
+                if keyword in description_lower:
+                    return result
         
         return ("Uncategorized", "Journal")
     
-    def _parse_amount(self, amount_str: str) -> float:
-        """Parse amount string to float"""
-        try:
-            if not amount_str or str(amount_str).strip() == "":
-                return 0.0
-            
-            # Remove currency symbols and commas
-            amount_str = str(amount_str).replace('₹', '').replace('Rs', '').replace(',', '').strip()
-            
-            # Handle negative amounts in parentheses
-            if amount_str.startswith('(') and amount_str.endswith(')'):
-                amount_str = '-' + amount_str[1:-1]
-            
-            return float(amount_str)
-        except:
-            return 0.0
-    
     def get_transactions(self, from_date: Optional[str] = None,
                         to_date: Optional[str] = None,
                         category: Optional[str] = None) -> List[Dict]:
@@ -267,31 +356,43 @@ class BankStatementModule:
             Dict with summary
         """
         try:
-            transactions = self.get_transactions(from_date, to_date)
+            query = """
+                SELECT category, TOTAL(debit), TOTAL(credit), COUNT(*)
+                FROM bank_transactions WHERE 1=1
+            """
+            params = []
             
-            total_debit = sum(t['debit'] for t in transactions)
-            total_credit = sum(t['credit'] for t in transactions)
+            if from_date:
+                query += " AND date >= ?"
+                params.append(from_date)
+            
+            if to_date:
+                query += " AND date <= ?"
+                params.append(to_date)
             
-            # Summary by category
+            query += " GROUP BY category"
+            
+            self.db.cursor.execute(query, params)
+            
+            # Summary by category; overall totals are summed from the groups
             by_category = {}
-            for txn in transactions:
-                category = txn['category']
-                if category not in by_category:
-                    by_category[category] = {
-                        "debit": 0,
-                        "credit": 0,
-                        "count": 0
-                    }
-                
-                by_category[category]['debit'] += txn['debit']
-                by_category[category]['credit'] += txn['credit']
-                by_category[category]['count'] += 1
+            total_debit = total_credit = 0.0
+            transaction_count = 0
+            for category, debit, credit, count in self.db.cursor.fetchall():
+                by_category[category] = {
+                    "debit": debit,
+                    "credit": credit,
+                    "count": count
+                }
+                total_debit += debit
+                total_credit += credit
+                transaction_count += count
             
             return {
                 "total_debit": total_debit,
                 "total_credit": total_credit,
                 "net_change": total_credit - total_debit,
-                "transaction_count": len(transactions),
+                "transaction_count": transaction_count,
                 "by_category": by_category
             }
         except Exception as e:
@@ -316,7 +417,7 @@ class BankStatementModule:
                 SET category = ?, tally_voucher_type = ?
                 WHERE id = ?
             """, (category, voucher_type, transaction_id))
-            self.db.connection.commit()
+            self.db.commit()
             
             return {
                 "success": True,
@@ -390,7 +491,7 @@ class BankStatementModule:
                     "UPDATE bank_transactions SET tally_synced = 1 WHERE id = ?",
                     (transaction_id,)
                 )
-                self.db.connection.commit()
+                self.db.commit()
                 
                 return {
                     "success": True,
@@ -3,15 +3,15 @@ Expense tracking module with OCR, creditor aging, payment reminders
 Handles expense management with automated tracking and reminders
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import json
 
 from database.db import db
 from tally.voucher import tally_voucher
 from tally.ledger import tally_ledger
 from invoice.scanner import invoice_scanner
-from utils.constants import EXPENSE_CATEGORIES
+from utils.constants import EXPENSE_CATEGORIES, EXPENSE_CATEGORIES_SET
 from utils.helpers import (
     format_indian_currency,
     format_date_indian,
@@ -20,6 +20,31 @@ from utils.helpers import (
 )
 import config
 
+# Fixed statements so sqlite3's per-connection statement cache reuses the
+# compiled query; a missing bound is filled with the sentinel below. Both
+# return amounts in integer paise, so totals add up exactly. The unfiltered
+# summary reads the trigger-maintained expense_totals table
+_SUMMARY_SQL = """
+    SELECT category, total_paise, paid_paise, pending_paise, count
+    FROM expense_totals
+    WHERE count > 0
+"""
+_SUMMARY_BETWEEN_SQL = """
+    SELECT category,
+           SUM(paise) AS total_paise,
+           SUM(CASE WHEN payment_status = 'paid' THEN paise ELSE 0 END) AS paid_paise,
+           SUM(CASE WHEN payment_status IS NOT 'paid' THEN paise ELSE 0 END) AS pending_paise,
+           COUNT(*) AS count
+    FROM (
+        SELECT category, payment_status,
+               CAST(ROUND(IFNULL(amount, 0) * 100) AS INTEGER) AS paise
+        FROM expenses
+        WHERE date_ord BETWEEN ? AND ?
+    )
+    GROUP BY category
+"""
+_MAX_ORDINAL = datetime.max.toordinal()
+
 
 class ExpenseModule:
     """Manager for expense tracking and creditor management"""
@@ -49,40 +74,20 @@ class ExpenseModule:
             Dict with expense details and status
         """
         try:
-            # Parse and validate date
-            if expense_date:
-                date_obj = parse_date(expense_date)
-                if not date_obj:
-                    return {"error": "Invalid expense date format"}
-                expense_date_str = format_date_indian(date_obj)
-                tally_date = date_obj.strftime("%Y%m%d")
-            else:
-                date_obj = datetime.now()
-                expense_date_str = format_date_indian(date_obj)
-                tally_date = date_obj.strftime("%Y%m%d")
+            expense = self._prepare_expense(vendor_name, amount, category, description,
+                                            expense_date, due_date)
+            if "error" in expense:
+                return expense
             
-            # Calculate due date
-            if due_date:
-                due_date_obj = parse_date(due_date)
-                if not due_date_obj:
-                    return {"error": "Invalid due date format"}
-                due_date_str = format_date_indian(due_date_obj)
-            else:
-                due_date_obj = calculate_due_date(date_obj, 30)
-                due_date_str = format_date_indian(due_date_obj)
-            
-            # Validate category
-            if category not in EXPENSE_CATEGORIES:
-                return {"error": f"Invalid category. Must be one of: {', '.join(EXPENSE_CATEGORIES)}"}
-            
-            # Save to database
+            # The insert commits on its own before Tally is contacted, so the
+            # database is never locked while waiting on the network
             expense_id = self.db.insert_expense(
                 vendor_name=vendor_name,
                 amount=amount,
                 category=category,
                 description=description,
-                date=expense_date_str,
-                due_date=due_date_str
+                date=expense["expense_date"],
+                due_date=expense["due_date"]
             )
             
             result = {
@@ -92,8 +97,8 @@ class ExpenseModule:
                 "amount": amount,
                 "category": category,
                 "description": description,
-                "expense_date": expense_date_str,
-                "due_date": due_date_str,
+                "expense_date": expense["expense_date"],
+                "due_date": expense["due_date"],
                 "status": "pending"
             }
             
@@ -101,7 +106,7 @@ class ExpenseModule:
             if post_to_tally and config.TALLY_ENABLED:
                 try:
                     success = self._post_expense_to_tally(
-                        date=tally_date,
+                        date=expense["tally_date"],
                         vendor=vendor_name,
                         category=category,
                         amount=amount,
@@ -113,7 +118,6 @@ class ExpenseModule:
                             "UPDATE expenses SET tally_synced = 1 WHERE id = ?",
                             (expense_id,)
                         )
-                        self.db.connection.commit()
                 except Exception as e:
                     result["tally_error"] = f"Failed to post to Tally: {str(e)}"
                     # Continue anyway - data is saved in SQLite
@@ -123,8 +127,149 @@ class ExpenseModule:
         except Exception as e:
             return {"error": f"Failed to create expense: {str(e)}"}
     
+    def create_expenses_bulk(self, expenses: List[Dict], post_to_tally: bool = True) -> Dict:
+        """
+        Create many expense entries in a single transaction
+        
+        All valid rows are written with one executemany and one commit
+        before anything reaches Tally, so a failed insert leaves no
+        vouchers behind and the database is not locked while waiting on
+        Tally. Each new expense is then posted (if enabled), and the ones
+        that went through are flagged tally_synced in one update.
+        
+        Args:
+            expenses: Dicts with the create_expense arguments (vendor_name,
+                      amount, category, description and optional
+                      expense_date/due_date)
+            post_to_tally: Post each expense to Tally
+            
+        Returns:
+            Dict with created count, new expense IDs and per-row errors
+        """
+        try:
+            valid = []
+            errors = []
+            tally_enabled = post_to_tally and config.TALLY_ENABLED
+            
+            for index, data in enumerate(expenses):
+                expense = self._prepare_expense(
+                    data.get("vendor_name"), data.get("amount"), data.get("category"),
+                    data.get("description"), data.get("expense_date"), data.get("due_date")
+                )
+                if "error" in expense:
+                    errors.append({"index": index, "error": expense["error"]})
+                    continue
+                valid.append((index, data, expense))
+            
+            expense_ids = self.db.insert_expenses_bulk(
+                (data["vendor_name"], data["amount"], data["category"],
+                 data["description"], expense["expense_date"], expense["due_date"])
+                for _, data, expense in valid
+            )
+            
+            result = {
+                "success": True,
+                "created_count": len(expense_ids),
+                "expense_ids": expense_ids,
+                "errors": errors
+            }
+            
+            if tally_enabled and valid:
+                # Make sure every vendor and category ledger in the batch
+                # exists with one lookup and one create, not two probes per
+                # expense. Keyed by (name, group), so a vendor named like a
+                # category still gets its creditor ledger spec
+                specs = list(dict.fromkeys(
+                    spec
+                    for _, data, _ in valid
+                    for spec in ((data["vendor_name"], "Sundry Creditors"),
+                                 (data["category"], "Indirect Expenses"))
+                ))
+                if not self._ensure_ledgers(specs):
+                    # Nothing is posted against ledgers that may not exist;
+                    # the expenses stay saved with tally_synced = 0
+                    result["tally_error"] = ("Failed to post to Tally: could not confirm "
+                                             "the vendor and category ledgers")
+                    return result
+                
+                synced_ids = []
+                for expense_id, (index, data, expense) in zip(expense_ids, valid):
+                    try:
+                        if self._post_expense_to_tally(
+                            date=expense["tally_date"],
+                            vendor=data["vendor_name"],
+                            category=data["category"],
+                            amount=data["amount"],
+                            description=data["description"],
+                            ensure_ledgers=False
+                        ):
+                            synced_ids.append(expense_id)
+                    except Exception as e:
+                        errors.append({"index": index,
+                                       "tally_error": f"Failed to post to Tally: {str(e)}"})
+                self.db.mark_expenses_tally_synced(synced_ids)
+            
+            return result
+            
+        except Exception as e:
+            return {"error": f"Failed to create expenses: {str(e)}"}
+    
+    def _prepare_expense(self, vendor_name: str, amount: float, category: str,
+                         description: str, expense_date: Optional[str],
+                         due_date: Optional[str]) -> Dict:
+        """
+        Validate an expense and normalise its dates
+        
+        Returns:
+            Dict with expense_date, due_date (DD-MM-YYYY) and tally_date
+            (YYYYMMDD), or a dict with an error message
+        """
+        # Parse and validate date
+        if expense_date:
+            date_obj = parse_date(expense_date)
+            if not date_obj:
+                return {"error": "Invalid expense date format"}
+        else:
+            date_obj = datetime.now()
+        
+        # Calculate due date
+        if due_date:
+            due_date_obj = parse_date(due_date)
+            if not due_date_obj:
+                return {"error": "Invalid due date format"}
+        else:
+            due_date_obj = calculate_due_date(date_obj, 30)
+        
+        # Validate category
+        if category not in EXPENSE_CATEGORIES_SET:
+            return {"error": f"Invalid category. Must be one of: {', '.join(EXPENSE_CATEGORIES)}"}
+        
+        return {
+            "expense_date": format_date_indian(date_obj),
+            "due_date": format_date_indian(due_date_obj),
+            "tally_date": date_obj.strftime("%Y%m%d")
+        }
+    
+    def _ensure_ledgers(self, specs: List[Tuple[str, str]]) -> bool:
+        """
+        Create whichever of the given Tally ledgers are missing
+        
+        Args:
+            specs: (ledger name, parent group) pairs
+            
+        Returns:
+            True once every ledger is known to exist; False if Tally could
+            not be queried or did not confirm the new ledgers
+        """
+        exists = tally_ledger.ledgers_exist([name for name, _ in specs])
+        if exists is None:
+            return False
+        missing = [(name, group) for name, group in specs if not exists[name]]
+        return tally_ledger.create_ledgers_bulk(missing)
+    
     def _post_expense_to_tally(self, date: str, vendor: str, category: str,
-                              amount: float, description: str) -> bool:
+                              amount: float, description: str,
+                              ensure_ledgers: bool = True) -> bool:
         """
         Post expense to Tally as journal voucher
         
@@ -134,17 +279,20 @@ class ExpenseModule:
             category: Expense category
             amount: Expense amount
             description: Description
+            ensure_ledgers: Create missing vendor/category ledgers first
+                            (bulk callers do this once per batch)
             
         Returns:
             True if successful
         """
         try:
             # Ensure ledgers exist
-            if not tally_ledger.ledger_exists(vendor):
-                tally_ledger.create_ledger(vendor, "Sundry Creditors")
-            
-            if not tally_ledger.ledger_exists(category):
-                tally_ledger.create_ledger(category, "Indirect Expenses")
+            if ensure_ledgers:
+                if not tally_ledger.ledger_exists(vendor):
+                    tally_ledger.create_ledger(vendor, "Sundry Creditors")
+                
+                if not tally_ledger.ledger_exists(category):
+                    tally_ledger.create_ledger(category, "Indirect Expenses")
             
             # Create journal entries
             entries = [
@@ -186,18 +334,6 @@ class ExpenseModule:
             Dict with status
         """
         try:
-            # Get expense details
-            self.db.cursor.execute("SELECT * FROM expenses WHERE id = ?", (expense_id,))
-            expense = self.db.cursor.fetchone()
-            
-            if not expense:
-                return {"error": "Expense not found"}
-            
-            expense = dict(expense)
-            
-            if expense['payment_status'] == 'paid':
-                return {"error": "Expense already marked as paid"}
-            
             # Parse payment date
             if payment_date:
                 date_obj = parse_date(payment_date)
@@ -210,8 +346,23 @@ class ExpenseModule:
                 payment_date_str = format_date_indian(date_obj)
                 tally_date = date_obj.strftime("%Y%m%d")
             
-            # Update database
-            self.db.update_expense_payment(expense_id, payment_date_str)
+            # Get expense details
+            self.db.cursor.execute("""
+                SELECT amount, vendor_name, category, description
+                FROM expenses WHERE id = ?
+            """, (expense_id,))
+            expense = self.db.cursor.fetchone()
+            
+            if not expense:
+                return {"error": "Expense not found"}
+            
+            expense = dict(expense)
+            
+            # Claim the expense before anything reaches Tally: the update only
+            # applies while it is still pending, so of two concurrent payments
+            # only the one that wins here posts a voucher
+            if not self.db.update_expense_payment(expense_id, payment_date_str):
+                return {"error": "Expense already marked as paid"}
             
             result = {
                 "success": True,
@@ -220,7 +371,9 @@ class ExpenseModule:
                 "amount": expense['amount']
             }
             
-            # Post payment to Tally
+            # Post payment to Tally with no transaction open, so the database
+            # is not locked while waiting on the network. A failed post leaves
+            # tally_synced at 0 for a later sync
             if post_to_tally:
                 try:
                     bank_ledger = "Bank" if payment_mode == "Bank" else "Cash"
@@ -232,6 +385,11 @@ class ExpenseModule:
                         narration=f"Payment for {expense['category']}: {expense['description']}"
                     )
                     result["tally_posted"] = success
+                    if success:
+                        self.db.cursor.execute(
+                            "UPDATE expenses SET tally_synced = 1 WHERE id = ?",
+                            (expense_id,)
+                        )
                 except Exception as e:
                     result["tally_error"] = f"Failed to post to Tally: {str(e)}"
             
@@ -248,42 +406,35 @@ class ExpenseModule:
             overdue_only: Return only overdue expenses
             
         Returns:
-            List of pending expense records
+            List of pending expense records ordered by due date, with
+            days_until_due (or days_overdue when overdue_only is set)
         """
         try:
-            expenses = self.db.get_expenses(status='pending')
+            # Day counts are computed by SQLite against this one reference day
+            today = datetime.now().toordinal()
             
             if overdue_only:
-                today = datetime.now()
-                overdue = []
-                for exp in expenses:
-                    due_date = parse_date(exp['due_date'])
-                    if due_date and due_date < today:
-                        exp['days_overdue'] = (today - due_date).days
-                        overdue.append(exp)
-                return overdue
-            
-            # Add days until due
-            for exp in expenses:
-                due_date = parse_date(exp['due_date'])
-                if due_date:
-                    days_until_due = (due_date - datetime.now()).days
-                    exp['days_until_due'] = days_until_due
-            
-            return expenses
+                return self.db.get_overdue_expenses(today)
+            
+            return self.db.get_pending_expenses(today)
         except Exception as e:
             return []
     
-    def get_creditor_aging(self) -> Dict:
+    def get_creditor_aging(self, include_details: bool = True) -> Dict:
         """
         Get creditor aging analysis
         
+        Bucket totals are aggregated in SQLite; the per-creditor rows are
+        only fetched when include_details is set.
+        
+        Args:
+            include_details: Also list the creditors in each bucket
+            
         Returns:
             Dict with aging buckets
         """
         try:
-            creditors = self.db.get_creditors(status='pending')
-            today = datetime.now()
+            today = datetime.now().strftime("%Y-%m-%d")
             
             aging = {
                 "current": [],        # Not due yet
@@ -301,30 +452,12 @@ class ExpenseModule:
                 "90+": 0
             }
             
-            for creditor in creditors:
-                due_date = parse_date(creditor['due_date'])
-                if not due_date:
-                    continue
-                
-                days_overdue = (today - due_date).days
-                creditor['days_overdue'] = days_overdue
-                amount = creditor['amount']
-                
-                if days_overdue < 0:
-                    aging["current"].append(creditor)
-                    totals["current"] += amount
-                elif days_overdue <= 30:
-                    aging["0-30"].append(creditor)
-                    totals["0-30"] += amount
-                elif days_overdue <= 60:
-                    aging["31-60"].append(creditor)
-                    totals["31-60"] += amount
-                elif days_overdue <= 90:
-                    aging["61-90"].append(creditor)
-                    totals["61-90"] += amount
-                else:
-                    aging["90+"].append(creditor)
-                    totals["90+"] += amount
+            for bucket in self.db.get_creditor_aging_buckets(today):
+                totals[bucket['bucket']] = bucket['amount']
+            
+            if include_details:
+                for creditor in self.db.get_aged_creditors(today):
+                    aging[creditor.pop('bucket')].append(creditor)
             
             return {
                 "aging": aging,
@@ -334,6 +467,50 @@ class ExpenseModule:
         except Exception as e:
             return {"error": str(e)}
     
+    def get_creditor_aging_by_month(self, months: int = 4) -> Dict:
+        """
+        Get creditor aging grouped by calendar month of the due date
+        
+        Unlike the rolling 30/60/90 day buckets of get_creditor_aging, a
+        month bucket only changes as creditors are added or paid, not as
+        days pass.
+        
+        Args:
+            months: Number of month buckets; the last one also holds
+                    everything older
+            
+        Returns:
+            Dict with totals per bucket ("Upcoming", "This Month",
+            "Last Month", "2 Months Ago", ...) and the grand total
+        """
+        try:
+            months = max(months, 1)
+            now = datetime.now()
+            this_month = now.year * 12 + now.month - 1
+            
+            labels = ["This Month", "Last Month"] + [
+                f"{age} Months Ago" for age in range(2, months)
+            ]
+            labels = labels[:months]
+            if months > 1:
+                labels[-1] = f"{months - 1}+ Months Ago"
+            
+            totals = {"Upcoming": 0}
+            totals.update((label, 0) for label in labels)
+            
+            for row in self.db.get_creditor_totals_by_month():
+                year, month = row['month'].split('-')
+                age = this_month - (int(year) * 12 + int(month) - 1)
+                label = "Upcoming" if age < 0 else labels[min(age, months - 1)]
+                totals[label] += row['amount']
+            
+            return {
+                "totals": totals,
+                "grand_total": sum(totals.values())
+            }
+        except Exception as e:
+            return {"error": str(e)}
+    
     def get_payment_reminders(self, days_ahead: int = 7) -> List[Dict]:
         """
         Get payment reminders for upcoming due dates
@@ -345,22 +522,11 @@ class ExpenseModule:
             List of expenses due within specified days
         """
         try:
-            expenses = self.db.get_expenses(status='pending')
-            today = datetime.now()
-            cutoff_date = today + timedelta(days=days_ahead)
-            
-            reminders = []
-            for exp in expenses:
-                due_date = parse_date(exp['due_date'])
-                if due_date and today <= due_date <= cutoff_date:
-                    days_until_due = (due_date - today).days
-                    exp['days_until_due'] = days_until_due
-                    reminders.append(exp)
-            
-            # Sort by due date
-            reminders.sort(key=lambda x: x['due_date'])
-            
-            return reminders
+            today = datetime.now().toordinal()
+            
+            # Due after today and within days_ahead, already sorted by due
+            # date and carrying days_until_due
+            return self.db.get_due_between(today, today + days_ahead)
         except Exception as e:
             return []
     
@@ -377,47 +543,47 @@ class ExpenseModule:
             Dict with expense summary by category
         """
         try:
-            query = "SELECT * FROM expenses WHERE 1=1"
-            params = []
-            
-            if from_date:
-                query += " AND date >= ?"
-                params.append(from_date)
-            
-            if to_date:
-                query += " AND date <= ?"
-                params.append(to_date)
-            
-            self.db.cursor.execute(query, params)
-            expenses = [dict(row) for row in self.db.cursor.fetchall()]
-            
-            # Summarize by category
-            by_category = {}
-            total_amount = 0
-            paid_amount = 0
-            pending_amount = 0
-            
-            for exp in expenses:
-                category = exp['category']
-                amount = exp['amount']
+            # Compare day ordinals; DD-MM-YYYY strings do not sort by date
+            if from_date or to_date:
+                from_ord, to_ord = 1, _MAX_ORDINAL
                 
-                if category not in by_category:
-                    by_category[category] = 0
+                if from_date:
+                    from_date_obj = parse_date(from_date)
+                    if not from_date_obj:
+                        return {"error": "Invalid from date format"}
+                    from_ord = from_date_obj.toordinal()
                 
-                by_category[category] += amount
-                total_amount += amount
+                if to_date:
+                    to_date_obj = parse_date(to_date)
+                    if not to_date_obj:
+                        return {"error": "Invalid to date format"}
+                    to_ord = to_date_obj.toordinal()
                 
-                if exp['payment_status'] == 'paid':
-                    paid_amount += amount
-                else:
-                    pending_amount += amount
+                self.db.cursor.execute(_SUMMARY_BETWEEN_SQL, (from_ord, to_ord))
+            else:
+                self.db.cursor.execute(_SUMMARY_SQL)
+            
+            # One row per category; overall figures are summed from those in
+            # paise and converted to rupees once
+            by_category = {}
+            total_paise = 0
+            paid_paise = 0
+            pending_paise = 0
+            count = 0
+            
+            for category, total, paid, pending, category_count in self.db.cursor:
+                by_category[category] = total / 100
+                total_paise += total
+                paid_paise += paid
+                pending_paise += pending
+                count += category_count
             
             return {
                 "by_category": by_category,
-                "total_amount": total_amount,
-                "paid_amount": paid_amount,
-                "pending_amount": pending_amount,
-                "count": len(expenses)
+                "total_amount": total_paise / 100,
+                "paid_amount": paid_paise / 100,
+                "pending_amount": pending_paise / 100,
+                "count": count
             }
         except Exception as e:
             return {"error": str(e)}
@@ -433,25 +599,43 @@ class ExpenseModule:
             Dict with extracted bill data
         """
         try:
-            extracted_data = self.scanner.scan_file(file_path)
-            
-            if "error" in extracted_data:
-                return extracted_data
-            
-            # Format the data for expense entry
-            result = {
-                "success": True,
-                "vendor_name": extracted_data.get("vendor_name", ""),
-                "amount": extracted_data.get("total_amount", 0),
-                "invoice_no": extracted_data.get("invoice_no", ""),
-                "date": extracted_data.get("invoice_date", ""),
-                "raw_text": extracted_data.get("raw_text", "")
-            }
-            
-            return result
-            
+            return self._format_bill(self.scanner.scan_file(file_path))
         except Exception as e:
             return {"error": f"Failed to scan expense bill: {str(e)}"}
+    
+    def scan_expense_bills(self, file_paths: List[str]) -> List[Dict]:
+        """
+        Scan many expense bills and extract data
+        
+        Images are OCRed in one Tesseract batch and PDFs are read across
+        worker processes (see InvoiceScanner.scan_files).
+        
+        Args:
+            file_paths: Paths to bill files (PDF or image)
+            
+        Returns:
+            List of dicts with extracted bill data, in input order
+        """
+        try:
+            return [self._format_bill(extracted_data)
+                    for extracted_data in self.scanner.scan_files(file_paths)]
+        except Exception as e:
+            return [{"error": f"Failed to scan expense bill: {str(e)}"}
+                    for _ in file_paths]
+    
+    def _format_bill(self, extracted_data: Dict) -> Dict:
+        """Format scanned invoice data for expense entry"""
+        if "error" in extracted_data:
+            return extracted_data
+        
+        return {
+            "success": True,
+            "vendor_name": extracted_data.get("vendor_name", ""),
+            "amount": extracted_data.get("total_amount", 0),
+            "invoice_no": extracted_data.get("invoice_no", ""),
+            "date": extracted_data.get("invoice_date", ""),
+            "raw_text": extracted_data.get("raw_text", "")
+        }
 
 
 # Global instance
@@ -3,13 +3,19 @@ GST (Goods and Services Tax) computation module
 GST calculation, GSTR-1, GSTR-3B helpers
 """
 
+import calendar
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib decoder
+    orjson = None
+
 from database.db import db
-from utils.constants import GST_RATE_SLABS, HSN_CODES, STATE_CODES
+from utils.constants import GST_RATE_SLABS, HSN_DESCRIPTIONS, STATE_CODES
 from utils.helpers import (
     format_indian_currency,
     format_date_indian,
@@ -21,6 +27,63 @@ from utils.helpers import (
 )
 import config
 
+# Tax totals of one table over a date range, aggregated by SQLite so no
+# rows are fetched into Python
+_TAX_TOTALS_SQL = {
+    table: f"""
+        SELECT TOTAL(subtotal) AS taxable_value, TOTAL(cgst) AS cgst,
+               TOTAL(sgst) AS sgst, TOTAL(igst) AS igst,
+               TOTAL(total) AS total, COUNT(*) AS count
+        FROM {table} WHERE date_iso BETWEEN ? AND ?
+    """
+    for table in ("sales", "purchases")
+}
+
+# A month's sales for GSTR-1 in date order, each tagged with its return
+# section: B2B when the customer has a GSTIN, otherwise B2C Large above
+# 2.5 lakhs
+_GSTR1_SALES_SQL = """
+    SELECT invoice_no, date, customer_name, customer_gstin,
+           subtotal, cgst, sgst, igst, total, items_json,
+           CASE
+               WHEN length(customer_gstin) = 15 THEN 'b2b'
+               WHEN total > 250000 THEN 'b2c_large'
+               ELSE 'b2c_small'
+           END AS section
+    FROM sales WHERE date_iso BETWEEN ? AND ?
+    ORDER BY date_iso, id
+"""
+
+# Sales totals per place-of-supply state over a date range; sales without
+# a customer GSTIN count towards the state bound as the first parameter
+_STATE_SALES_SQL = """
+    SELECT COALESCE(place_of_supply_state, ?) AS state_code,
+           COUNT(*) AS count, TOTAL(subtotal) AS taxable_value,
+           TOTAL(cgst) AS cgst, TOTAL(sgst) AS sgst, TOTAL(igst) AS igst,
+           TOTAL(total) AS total
+    FROM sales WHERE date_iso BETWEEN ? AND ?
+    GROUP BY state_code
+"""
+
+
+def _loads(text: str):
+    """Decode a JSON string, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _month_range(month: int, year: int) -> Tuple[str, str]:
+    """First and last day of a month as ISO (YYYY-MM-DD) dates"""
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d}"
+
+
+def _to_iso(date_string: str) -> Optional[str]:
+    """Convert a DD-MM-YYYY (or other parseable) date to ISO, None if invalid"""
+    date_obj = parse_date(date_string)
+    return date_obj.strftime("%Y-%m-%d") if date_obj else None
+
 
 class GSTModule:
     """Manager for GST computation and reporting"""
@@ -91,65 +154,50 @@ class GSTModule:
             Dict with GSTR-1 data
         """
         try:
-            # Get date range for the month
-            from_date = f"01-{month:02d}-{year}"
-            if month == 12:
-                to_date = f"31-{month:02d}-{year}"
-            else:
-                # Get last day of month
-                import calendar
-                last_day = calendar.monthrange(year, month)[1]
-                to_date = f"{last_day:02d}-{month:02d}-{year}"
+            # Get all sales for the month; sales.date is DD-MM-YYYY, so the
+            # range is matched on its ISO form to be chronological
+            from_date, to_date = _month_range(month, year)
+            self.db.cursor.execute(_GSTR1_SALES_SQL, (from_date, to_date))
             
-            # Get all sales for the month
-            query = "SELECT * FROM sales WHERE date >= ? AND date <= ?"
-            self.db.cursor.execute(query, (from_date, to_date))
-            sales = [dict(row) for row in self.db.cursor.fetchall()]
-            
-            # Categorize sales
+            # Sales by GSTR-1 section, as categorized by the query
             b2b = []  # B2B (Business to Business) - with GSTIN
             b2c_large = []  # B2C Large (invoice value > 2.5 lakhs)
             b2c_small = []  # B2C Small (invoice value <= 2.5 lakhs)
+            sections = {"b2b": b2b, "b2c_large": b2c_large, "b2c_small": b2c_small}
+            invoices = []  # All of the above, in date order
             
             total_taxable = 0
             total_cgst = 0
             total_sgst = 0
             total_igst = 0
             
-            for sale in sales:
-                items = json.loads(sale['items_json'])
+            for (invoice_no, date, customer_name, customer_gstin,
+                 subtotal, cgst, sgst, igst, total, items_json, section) in self.db.cursor:
+                items = _loads(items_json)
                 
                 sale_data = {
-                    "invoice_no": sale['invoice_no'],
-                    "invoice_date": sale['date'],
-                    "customer_name": sale['customer_name'],
-                    "customer_gstin": sale['customer_gstin'],
-                    "taxable_value": sale['subtotal'],
-                    "cgst": sale['cgst'],
-                    "sgst": sale['sgst'],
-                    "igst": sale['igst'],
-                    "total": sale['total'],
+                    "invoice_no": invoice_no,
+                    "invoice_date": date,
+                    "customer_name": customer_name,
+                    "customer_gstin": customer_gstin,
+                    "taxable_value": subtotal,
+                    "cgst": cgst,
+                    "sgst": sgst,
+                    "igst": igst,
+                    "total": total,
                     "items": items
                 }
                 
-                total_taxable += sale['subtotal']
-                total_cgst += sale['cgst']
-                total_sgst += sale['sgst']
-                total_igst += sale['igst']
+                invoices.append(sale_data)
+                sections[section].append(sale_data)
                 
-                # Categorize
-                if sale['customer_gstin'] and len(sale['customer_gstin']) == 15:
-                    # B2B
-                    b2b.append(sale_data)
-                elif sale['total'] > 250000:
-                    # B2C Large
-                    b2c_large.append(sale_data)
-                else:
-                    # B2C Small
-                    b2c_small.append(sale_data)
+                total_taxable += subtotal
+                total_cgst += cgst
+                total_sgst += sgst
+                total_igst += igst
             
-            # Summarize by HSN
-            hsn_summary = self._get_hsn_summary(sales)
+            # Summarize by HSN, reusing the items decoded above
+            hsn_summary = self._get_hsn_summary(invoices)
             
             return {
                 "success": True,
@@ -169,7 +217,7 @@ class GSTModule:
                 },
                 "hsn_summary": hsn_summary,
                 "totals": {
-                    "invoice_count": len(sales),
+                    "invoice_count": len(invoices),
                     "taxable_value": total_taxable,
                     "cgst": total_cgst,
                     "sgst": total_sgst,
@@ -194,35 +242,21 @@ class GSTModule:
         """
         try:
             # Get date range for the month
-            from_date = f"01-{month:02d}-{year}"
-            import calendar
-            last_day = calendar.monthrange(year, month)[1]
-            to_date = f"{last_day:02d}-{month:02d}-{year}"
-            
-            # Get outward supplies (sales)
-            self.db.cursor.execute(
-                "SELECT * FROM sales WHERE date >= ? AND date <= ?",
-                (from_date, to_date)
-            )
-            sales = [dict(row) for row in self.db.cursor.fetchall()]
-            
-            # Get inward supplies (purchases)
-            self.db.cursor.execute(
-                "SELECT * FROM purchases WHERE date >= ? AND date <= ?",
-                (from_date, to_date)
-            )
-            purchases = [dict(row) for row in self.db.cursor.fetchall()]
-            
-            # Calculate outward supplies
-            outward_taxable = sum(s['subtotal'] for s in sales)
-            outward_cgst = sum(s['cgst'] for s in sales)
-            outward_sgst = sum(s['sgst'] for s in sales)
-            outward_igst = sum(s['igst'] for s in sales)
-            
-            # Calculate inward supplies (ITC - Input Tax Credit)
-            itc_cgst = sum(p['cgst'] for p in purchases)
-            itc_sgst = sum(p['sgst'] for p in purchases)
-            itc_igst = sum(p['igst'] for p in purchases)
+            from_date, to_date = _month_range(month, year)
+            
+            # Outward supplies (sales) and inward supplies (purchases, for
+            # ITC - Input Tax Credit), one aggregate row each
+            sales = self._get_tax_totals("sales", from_date, to_date)
+            purchases = self._get_tax_totals("purchases", from_date, to_date)
+            
+            outward_taxable = sales['taxable_value']
+            outward_cgst = sales['cgst']
+            outward_sgst = sales['sgst']
+            outward_igst = sales['igst']
+            
+            itc_cgst = purchases['cgst']
+            itc_sgst = purchases['sgst']
+            itc_igst = purchases['igst']
             
             # Calculate net tax liability
             net_cgst = outward_cgst - itc_cgst
@@ -262,21 +296,36 @@ class GSTModule:
                     "total_payable": max(0, total_tax_payable)
                 },
                 "summary": {
-                    "sales_count": len(sales),
-                    "purchase_count": len(purchases),
-                    "total_sales": sum(s['total'] for s in sales),
-                    "total_purchases": sum(p['total'] for p in purchases)
+                    "sales_count": sales['count'],
+                    "purchase_count": purchases['count'],
+                    "total_sales": sales['total'],
+                    "total_purchases": purchases['total']
                 }
             }
         except Exception as e:
             return {"error": f"Failed to generate GSTR-3B: {str(e)}"}
     
+    def _get_tax_totals(self, table: str, from_date: str, to_date: str) -> Dict:
+        """
+        Sum taxable value, GST components and totals of sales or purchases
+        
+        Args:
+            table: "sales" or "purchases"
+            from_date: Start date (YYYY-MM-DD)
+            to_date: End date (YYYY-MM-DD)
+            
+        Returns:
+            Dict with taxable_value, cgst, sgst, igst, total and count
+        """
+        self.db.cursor.execute(_TAX_TOTALS_SQL[table], (from_date, to_date))
+        return dict(self.db.cursor.fetchone())
+    
     def _get_hsn_summary(self, sales: List[Dict]) -> List[Dict]:
         """
         Generate HSN-wise summary
         
         Args:
-            sales: List of sales records
+            sales: Invoices with their decoded "items" and "igst"
             
         Returns:
             List of HSN summaries
@@ -291,33 +340,35 @@ class GSTModule:
         })
         
         for sale in sales:
-            items = json.loads(sale['items_json'])
+            # The GST split is the same for every item on an invoice
+            is_inter = sale['igst'] > 0
             
-            for item in items:
+            for item in sale['items']:
                 hsn = item.get('hsn', 'NA')
-                qty = item.get('quantity', 0)
                 amount = item.get('amount', 0)
                 gst_rate = item.get('gst_rate', 0)
                 
-                hsn_data[hsn]['quantity'] += qty
-                hsn_data[hsn]['taxable_value'] += amount
-                hsn_data[hsn]['rate'] = gst_rate
+                row = hsn_data[hsn]
+                row['quantity'] += item.get('quantity', 0)
+                row['taxable_value'] += amount
+                row['rate'] = gst_rate
                 
                 # Proportional GST
                 item_gst = (amount * gst_rate) / 100
                 
-                if sale['igst'] > 0:
-                    hsn_data[hsn]['igst'] += item_gst
+                if is_inter:
+                    row['igst'] += item_gst
                 else:
-                    hsn_data[hsn]['cgst'] += item_gst / 2
-                    hsn_data[hsn]['sgst'] += item_gst / 2
+                    half = item_gst / 2
+                    row['cgst'] += half
+                    row['sgst'] += half
         
         # Convert to list
         result = []
         for hsn, data in hsn_data.items():
             result.append({
                 "hsn": hsn,
-                "description": HSN_CODES.get(hsn, {}).get('description', 'Unknown'),
+                "description": HSN_DESCRIPTIONS.get(hsn, 'Unknown'),
                 "quantity": data['quantity'],
                 "taxable_value": round(data['taxable_value'], 2),
                 "cgst": round(data['cgst'], 2),
@@ -340,30 +391,23 @@ class GSTModule:
             Dict with GST liability
         """
         try:
-            # Get sales
-            self.db.cursor.execute(
-                "SELECT * FROM sales WHERE date >= ? AND date <= ?",
-                (from_date, to_date)
-            )
-            sales = [dict(row) for row in self.db.cursor.fetchall()]
-            
-            # Get purchases
-            self.db.cursor.execute(
-                "SELECT * FROM purchases WHERE date >= ? AND date <= ?",
-                (from_date, to_date)
-            )
-            purchases = [dict(row) for row in self.db.cursor.fetchall()]
+            from_iso, to_iso = _to_iso(from_date), _to_iso(to_date)
+            if not from_iso or not to_iso:
+                return {"error": "Invalid date format"}
+            
+            sales = self._get_tax_totals("sales", from_iso, to_iso)
+            purchases = self._get_tax_totals("purchases", from_iso, to_iso)
             
             # Output tax
-            output_cgst = sum(s['cgst'] for s in sales)
-            output_sgst = sum(s['sgst'] for s in sales)
-            output_igst = sum(s['igst'] for s in sales)
+            output_cgst = sales['cgst']
+            output_sgst = sales['sgst']
+            output_igst = sales['igst']
             output_total = output_cgst + output_sgst + output_igst
             
             # Input tax credit
-            input_cgst = sum(p['cgst'] for p in purchases)
-            input_sgst = sum(p['sgst'] for p in purchases)
-            input_igst = sum(p['igst'] for p in purchases)
+            input_cgst = purchases['cgst']
+            input_sgst = purchases['sgst']
+            input_igst = purchases['igst']
             input_total = input_cgst + input_sgst + input_igst
             
             # Net liability
@@ -443,12 +487,17 @@ class GSTModule:
             Dict with state-wise sales
         """
         try:
-            # Get sales
-            self.db.cursor.execute(
-                "SELECT * FROM sales WHERE date >= ? AND date <= ?",
-                (from_date, to_date)
-            )
-            sales = [dict(row) for row in self.db.cursor.fetchall()]
+            from_iso, to_iso = _to_iso(from_date), _to_iso(to_date)
+            if not from_iso or not to_iso:
+                return {"error": "Invalid date format"}
+            
+            # Assume same state if no GSTIN
+            company_gstin = config.COMPANY_INFO.get('gstin', '')
+            company_state = company_gstin[:2] if company_gstin else ''
+            
+            # One row per state code; codes are only named here, and codes
+            # without a known state are merged under "Unknown"
+            self.db.cursor.execute(_STATE_SALES_SQL, (company_state, from_iso, to_iso))
             
             state_summary = defaultdict(lambda: {
                 "count": 0,
@@ -459,24 +508,14 @@ class GSTModule:
                 "total": 0
             })
             
-            company_gstin = config.COMPANY_INFO.get('gstin', '')
-            company_state = company_gstin[:2] if company_gstin else ''
-            
-            for sale in sales:
-                if sale['customer_gstin']:
-                    state_code = sale['customer_gstin'][:2]
-                    state_name = STATE_CODES.get(state_code, "Unknown")
-                else:
-                    # Assume same state if no GSTIN
-                    state_code = company_state
-                    state_name = STATE_CODES.get(state_code, "Unknown")
-                
-                state_summary[state_name]['count'] += 1
-                state_summary[state_name]['taxable_value'] += sale['subtotal']
-                state_summary[state_name]['cgst'] += sale['cgst']
-                state_summary[state_name]['sgst'] += sale['sgst']
-                state_summary[state_name]['igst'] += sale['igst']
-                state_summary[state_name]['total'] += sale['total']
+            for state_code, count, taxable_value, cgst, sgst, igst, total in self.db.cursor:
+                summary = state_summary[STATE_CODES.get(state_code, "Unknown")]
+                summary['count'] += count
+                summary['taxable_value'] += taxable_value
+                summary['cgst'] += cgst
+                summary['sgst'] += sgst
+                summary['igst'] += igst
+                summary['total'] += total
             
             return {
                 "success": True,
@@ -3,7 +3,14 @@ Ind AS (Indian Accounting Standards) knowledge base
 Comprehensive information about Ind AS standards
 """
 
-from typing import List, Dict, Optional
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Union
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to a regex scan
+    ahocorasick = None
 
 
 # Comprehensive Ind AS knowledge base
@@ -687,6 +694,44 @@ GAAP_TO_IND_AS_MAPPING = {
     "AS 32": "Ind AS 109 - Financial Instruments"
 }
 
+# The same mapping keyed by the old AS number, for lookups written as "as 1",
+# "AS-1", "1" or 1 rather than the exact "AS 1" key
+_GAAP_BY_NUMBER = {
+    int(as_key.split()[1]): ind_as for as_key, ind_as in GAAP_TO_IND_AS_MAPPING.items()
+}
+
+_AS_NUMBER_RE = re.compile(r'(?:as)?[\s-]*(\d+)')
+
+# Lower-cased searchable text of each standard (title, objective and key
+# principles), built once; the NUL separator keeps a keyword from
+# matching across two fields
+_SEARCH_TEXT = {
+    std_num: "\0".join([std_data["title"], std_data["objective"],
+                         *std_data["key_principles"]]).lower()
+    for std_num, std_data in IND_AS_STANDARDS.items()
+}
+
+# Lower-cased title of each standard, for finding standards named in text
+_TITLES = {std_data["title"].lower(): std_num for std_num, std_data in IND_AS_STANDARDS.items()}
+
+
+def _build_title_automaton():
+    """Build one Aho-Corasick automaton mapping every title to (number, length)"""
+    automaton = ahocorasick.Automaton()
+    for title, std_num in _TITLES.items():
+        automaton.add_word(title, (std_num, len(title)))
+    automaton.make_automaton()
+    return automaton
+
+
+if ahocorasick is not None:
+    _TITLE_AUTOMATON = _build_title_automaton()
+else:
+    _TITLE_PATTERNS = [
+        (re.compile(r'(?<!\w)' + re.escape(title) + r'(?!\w)'), std_num)
+        for title, std_num in _TITLES.items()
+    ]
+
 
 def search_ind_as(keyword: str) -> List[Dict]:
     """
@@ -698,27 +743,41 @@ def search_ind_as(keyword: str) -> List[Dict]:
     Returns:
         List of matching standards
     """
-    keyword = keyword.lower()
-    results = []
+    return [IND_AS_STANDARDS[std_num] for std_num in _search_numbers(keyword.lower())]
+
+
+@lru_cache(maxsize=256)
+def _search_numbers(keyword: str) -> Tuple[str, ...]:
+    """Numbers of the standards whose title, objective or key principles contain keyword"""
+    return tuple(std_num for std_num, text in _SEARCH_TEXT.items() if keyword in text)
+
+
+def find_standards_in_text(text: str) -> List[Dict]:
+    """
+    Find the Ind AS standards whose titles are mentioned in free text
     
-    for std_num, std_data in IND_AS_STANDARDS.items():
-        # Search in title
-        if keyword in std_data["title"].lower():
-            results.append(std_data)
-            continue
-        
-        # Search in objective
-        if keyword in std_data["objective"].lower():
-            results.append(std_data)
-            continue
+    Titles only match as whole words ("Leases" but not "releases"); the
+    text is scanned once for all titles.
+    
+    Args:
+        text: Text to scan, e.g. a user's question
         
-        # Search in key principles
-        for principle in std_data["key_principles"]:
-            if keyword in principle.lower():
-                results.append(std_data)
-                break
+    Returns:
+        List of mentioned standards, in knowledge base order
+    """
+    text = text.lower()
+    found = set()
+    
+    if ahocorasick is not None:
+        for end, (std_num, length) in _TITLE_AUTOMATON.iter(text):
+            start = end - length + 1
+            if ((start == 0 or not text[start - 1].isalnum() and text[start - 1] != '_')
+                    and (end + 1 == len(text) or not text[end + 1].isalnum() and text[end + 1] != '_')):
+                found.add(std_num)
+    else:
+        found.update(std_num for pattern, std_num in _TITLE_PATTERNS if pattern.search(text))
     
-    return results
+    return [std_data for std_num, std_data in IND_AS_STANDARDS.items() if std_num in found]
 
 
 def get_ind_as_standard(number: str) -> Optional[Dict]:
@@ -744,17 +803,25 @@ def get_all_ind_as_standards() -> Dict:
     return IND_AS_STANDARDS
 
 
-def map_gaap_to_ind_as(as_number: str) -> Optional[str]:
+def map_gaap_to_ind_as(as_number: Union[str, int]) -> Optional[str]:
     """
     Map old AS (Indian GAAP) to Ind AS
     
     Args:
-        as_number: Old AS number (e.g., "AS 1")
+        as_number: Old AS number (e.g., "AS 1", "as-1", "1" or 1)
         
     Returns:
         Corresponding Ind AS or None
     """
-    return GAAP_TO_IND_AS_MAPPING.get(as_number)
+    if isinstance(as_number, int):
+        return _GAAP_BY_NUMBER.get(as_number)
+    
+    mapped = GAAP_TO_IND_AS_MAPPING.get(as_number)
+    if mapped is not None:
+        return mapped
+    
+    match = _AS_NUMBER_RE.fullmatch(as_number.strip().lower())
+    return _GAAP_BY_NUMBER.get(int(match.group(1))) if match else None
 
 
 class IndASModule:
@@ -776,7 +843,11 @@ class IndASModule:
         """Get all Ind AS standards as a list"""
         return [std for std in IND_AS_STANDARDS.values()]
     
-    def map_gaap_to_ind_as(self, as_number: str) -> Optional[str]:
+    def find_standards_in_text(self, text: str) -> List[Dict]:
+        """Find the Ind AS standards whose titles are mentioned in text"""
+        return find_standards_in_text(text)
+    
+    def map_gaap_to_ind_as(self, as_number: Union[str, int]) -> Optional[str]:
         """Map old AS (Indian GAAP) to Ind AS"""
         return map_gaap_to_ind_as(as_number)
 
@@ -193,7 +193,7 @@ class PurchaseModule:
                             "UPDATE purchases SET tally_synced = 1 WHERE id = ?",
                             (purchase_id,)
                         )
-                        self.db.connection.commit()
+                        self.db.commit()
                 except Exception as e:
                     result["tally_error"] = f"Failed to post to Tally: {str(e)}"
                     # Continue anyway - data is saved in SQLite
@@ -173,7 +173,7 @@ class SalesModule:
                             "UPDATE sales SET tally_synced = 1 WHERE id = ?",
                             (sale_id,)
                         )
-                        self.db.connection.commit()
+                        self.db.commit()
                 except Exception as e:
                     result["tally_error"] = f"Failed to post to Tally: {str(e)}"
                     # Continue anyway - data is saved in SQLite
@@ -164,7 +164,7 @@ class TDSModule:
                             "UPDATE tds_register SET tally_synced = 1 WHERE id = ?",
                             (tds_id,)
                         )
-                        self.db.connection.commit()
+                        self.db.commit()
                 except Exception as e:
                     result["tally_error"] = f"Failed to post to Tally: {str(e)}"
                     # Continue anyway - data is saved in SQLite
@@ -4,10 +4,62 @@ Create, read, and manage ledgers in Tally
 """
 
 import xml.etree.ElementTree as ET
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from tally.connection import tally_connector
 
 
+# Master import envelope; {messages} holds one or more TALLYMESSAGE blocks
+_IMPORT_MASTERS_XML = """
+                <ENVELOPE>
+                    <HEADER>
+                        <VERSION>1</VERSION>
+                        <TALLYREQUEST>Import</TALLYREQUEST>
+                        <TYPE>Data</TYPE>
+                        <ID>All Masters</ID>
+                    </HEADER>
+                    <BODY>
+                        <DESC>
+                            <STATICVARIABLES>
+                                <IMPORTDUPS>@@DUPS</IMPORTDUPS>
+                            </STATICVARIABLES>
+                        </DESC>
+                        <DATA>{messages}
+                        </DATA>
+                    </BODY>
+                </ENVELOPE>
+            """
+
+
+def _ledger_message(name: str, parent_group: str, opening_balance: float = 0,
+                    gstin: str = "") -> str:
+    """Build the TALLYMESSAGE that creates one ledger"""
+    balance = abs(opening_balance)
+    
+    message = f"""
+                            <TALLYMESSAGE>
+                                <LEDGER NAME="{name}" ACTION="Create">
+                                    <NAME.LIST>
+                                        <NAME>{name}</NAME>
+                                    </NAME.LIST>
+                                    <PARENT>{parent_group}</PARENT>
+                                    <OPENINGBALANCE>{balance}</OPENINGBALANCE>
+                                    <ISBILLWISEON>Yes</ISBILLWISEON>
+                                    <ISCOSTCENTRESON>No</ISCOSTCENTRESON>
+            """
+    
+    # Add GSTIN if provided
+    if gstin:
+        message += f"""
+                                    <PARTYGSTIN>{gstin}</PARTYGSTIN>
+                                    <GSTREGISTRATIONTYPE>Regular</GSTREGISTRATIONTYPE>
+                """
+    
+    message += """
+                                </LEDGER>
+                            </TALLYMESSAGE>"""
+    return message
+
+
 class TallyLedger:
     """Manager for Tally ledger operations"""
     
@@ -75,6 +127,23 @@ class TallyLedger:
         except Exception as e:
             return None
     
+    def ledgers_exist(self, names: List[str]) -> Optional[Dict[str, bool]]:
+        """
+        Check several ledgers with a single request to Tally
+        
+        Args:
+            names: Ledger names
+            
+        Returns:
+            Dict mapping each name to True if the ledger exists, or None if
+            Tally could not be queried
+        """
+        try:
+            existing = set(self._fetch_ledgers())
+        except Exception as e:
+            return None
+        return {name: name in existing for name in names}
+    
     def list_ledgers(self, group: Optional[str] = None) -> List[str]:
         """
         List all ledgers or ledgers under a specific group
@@ -86,42 +155,46 @@ class TallyLedger:
             List of ledger names
         """
         try:
-            xml_request = """
-                <ENVELOPE>
-                    <HEADER>
-                        <VERSION>1</VERSION>
-                        <TALLYREQUEST>Export</TALLYREQUEST>
-                        <TYPE>Collection</TYPE>
-                        <ID>All Ledgers</ID>
-                    </HEADER>
-                    <BODY>
-                        <DESC>
-                            <STATICVARIABLES>
-                                <SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT>
-                            </STATICVARIABLES>
-                        </DESC>
-                    </BODY>
-                </ENVELOPE>
-            """
-            response = self.connector.send_request(xml_request)
-            
-            root = ET.fromstring(response)
-            ledgers = []
-            
-            for ledger in root.findall('.//LEDGER'):
-                name_elem = ledger.find('NAME')
-                parent_elem = ledger.find('PARENT')
-                
-                if name_elem is not None:
-                    if group is None:
-                        ledgers.append(name_elem.text)
-                    elif parent_elem is not None and parent_elem.text == group:
-                        ledgers.append(name_elem.text)
-            
-            return ledgers
+            return self._fetch_ledgers(group)
         except Exception as e:
             return []
     
+    def _fetch_ledgers(self, group: Optional[str] = None) -> List[str]:
+        """List ledger names, raising if Tally cannot be queried"""
+        xml_request = """
+            <ENVELOPE>
+                <HEADER>
+                    <VERSION>1</VERSION>
+                    <TALLYREQUEST>Export</TALLYREQUEST>
+                    <TYPE>Collection</TYPE>
+                    <ID>All Ledgers</ID>
+                </HEADER>
+                <BODY>
+                    <DESC>
+                        <STATICVARIABLES>
+                            <SVEXPORTFORMAT>$$SysName:XML</SVEXPORTFORMAT>
+                        </STATICVARIABLES>
+                    </DESC>
+                </BODY>
+            </ENVELOPE>
+        """
+        response = self.connector.send_request(xml_request)
+        
+        root = ET.fromstring(response)
+        ledgers = []
+        
+        for ledger in root.findall('.//LEDGER'):
+            name_elem = ledger.find('NAME')
+            parent_elem = ledger.find('PARENT')
+            
+            if name_elem is not None:
+                if group is None:
+                    ledgers.append(name_elem.text)
+                elif parent_elem is not None and parent_elem.text == group:
+                    ledgers.append(name_elem.text)
+        
+        return ledgers
+    
     def create_ledger(self, name: str, parent_group: str, 
                      opening_balance: float = 0, gstin: str = "") -> bool:
         """
@@ -141,51 +214,9 @@ class TallyLedger:
             if self.ledger_exists(name):
                 return True  # Already exists, no need to create
             
-            # Prepare opening balance
-            dr_cr = "Dr" if opening_balance >= 0 else "Cr"
-            balance = abs(opening_balance)
-            
-            # Build XML request
-            xml_request = f"""
-                <ENVELOPE>
-                    <HEADER>
-                        <VERSION>1</VERSION>
-                        <TALLYREQUEST>Import</TALLYREQUEST>
-                        <TYPE>Data</TYPE>
-                        <ID>All Masters</ID>
-                    </HEADER>
-                    <BODY>
-                        <DESC>
-                            <STATICVARIABLES>
-                                <IMPORTDUPS>@@DUPS</IMPORTDUPS>
-                            </STATICVARIABLES>
-                        </DESC>
-                        <DATA>
-                            <TALLYMESSAGE>
-                                <LEDGER NAME="{name}" ACTION="Create">
-                                    <NAME.LIST>
-                                        <NAME>{name}</NAME>
-                                    </NAME.LIST>
-                                    <PARENT>{parent_group}</PARENT>
-                                    <OPENINGBALANCE>{balance}</OPENINGBALANCE>
-                                    <ISBILLWISEON>Yes</ISBILLWISEON>
-                                    <ISCOSTCENTRESON>No</ISCOSTCENTRESON>
-            """
-            
-            # Add GSTIN if provided
-            if gstin:
-                xml_request += f"""
-                                    <PARTYGSTIN>{gstin}</PARTYGSTIN>
-                                    <GSTREGISTRATIONTYPE>Regular</GSTREGISTRATIONTYPE>
-                """
-            
-            xml_request += f"""
-                                </LEDGER>
-                            </TALLYMESSAGE>
-                        </DATA>
-                    </BODY>
-                </ENVELOPE>
-            """
+            xml_request = _IMPORT_MASTERS_XML.format(
+                messages=_ledger_message(name, parent_group, opening_balance, gstin)
+            )
             
             response = self.connector.send_request(xml_request)
             
@@ -194,6 +225,29 @@ class TallyLedger:
         except Exception as e:
             return False
     
+    def create_ledgers_bulk(self, specs: List[Tuple[str, str]]) -> bool:
+        """
+        Create several ledgers in one import request
+        
+        Args:
+            specs: (ledger name, parent group) pairs
+            
+        Returns:
+            True if Tally reports the ledgers created, False otherwise
+        """
+        if not specs:
+            return True
+        
+        try:
+            xml_request = _IMPORT_MASTERS_XML.format(
+                messages="".join(_ledger_message(name, parent_group)
+                                 for name, parent_group in specs)
+            )
+            response = self.connector.send_request(xml_request)
+            return "CREATED" in response.upper()
+        except Exception as e:
+            return False
+    
     def update_ledger_opening_balance(self, name: str, opening_balance: float) -> bool:
         """
         Update ledger opening balance
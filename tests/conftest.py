@@ -0,0 +1,10 @@
+"""Shared test setup"""
+
+import os
+import tempfile
+
+import config
+
+# database.db opens a module-level Database on import; point it at a
+# throwaway file instead of the application's accounting.db
+config.DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="accounting-tests-"), "accounting.db")
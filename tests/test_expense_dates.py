@@ -0,0 +1,84 @@
+"""
+Expense date ordinals must read every stored date format, or rows drop
+out of the pending, overdue, reminder and date-filtered queries
+"""
+
+from datetime import date
+
+import pytest
+
+from database.db import Database
+
+
+TODAY = date(2026, 10, 15).toordinal()
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "expenses.db"))
+    yield database
+    database.close()
+
+
+def _insert(db, vendor, expense_date, due_date):
+    return db.insert_expense(vendor_name=vendor, amount=100.0, category="Rent",
+                             description="", date=expense_date, due_date=due_date)
+
+
+@pytest.mark.parametrize("expense_date, due_date", [
+    ("01-10-2026", "10-10-2026"),
+    ("2026-10-01", "2026-10-10"),
+    ("2026-10-01 09:30:00", "2026-10-10 00:00:00"),
+    ("01/10/2026", "10/10/2026"),
+    ("01.10.2026", "10.10.2026"),
+])
+def test_date_formats_give_the_same_ordinals(db, expense_date, due_date):
+    expense_id = _insert(db, "vendor", expense_date, due_date)
+    db.cursor.execute("SELECT date_ord, due_date_ord FROM expenses WHERE id = ?", (expense_id,))
+    assert tuple(db.cursor.fetchone()) == (date(2026, 10, 1).toordinal(),
+                                           date(2026, 10, 10).toordinal())
+
+
+def test_unreadable_date_has_no_ordinal(db):
+    expense_id = _insert(db, "vendor", "someday", "10-13-2026")
+    db.cursor.execute("SELECT date_ord, due_date_ord FROM expenses WHERE id = ?", (expense_id,))
+    assert tuple(db.cursor.fetchone()) == (None, None)
+
+
+def test_iso_dated_row_is_in_due_date_queries(db):
+    _insert(db, "dmy overdue", "01-10-2026", "10-10-2026")
+    _insert(db, "iso overdue", "2026-10-01", "2026-10-10")
+    _insert(db, "iso due soon", "2026-10-01", "2026-10-20")
+    
+    overdue = {row["vendor_name"]: row["days_overdue"] for row in db.get_overdue_expenses(TODAY)}
+    assert overdue == {"dmy overdue": 5, "iso overdue": 5}
+    
+    due_soon = db.get_due_between(TODAY, TODAY + 7)
+    assert [(row["vendor_name"], row["days_until_due"]) for row in due_soon] == [("iso due soon", 5)]
+    
+    pending = db.get_pending_expenses(TODAY)
+    assert {row["vendor_name"] for row in pending} == {"dmy overdue", "iso overdue", "iso due soon"}
+
+
+def test_upgrade_recomputes_ordinals_of_existing_rows(tmp_path):
+    path = str(tmp_path / "old.db")
+    database = Database(path)
+    expense_id = _insert(database, "iso", "2026-10-01", "2026-10-10")
+    # Simulate a database whose column only understood DD-MM-YYYY
+    database.cursor.execute("DROP INDEX idx_exp_status_due")
+    database.cursor.execute("DROP INDEX idx_exp_date_ord_cat")
+    database._drop_column("expenses", "due_date_ord")
+    database._add_column(
+        "expenses", "due_date_ord",
+        "INTEGER GENERATED ALWAYS AS (CAST(julianday(substr(due_date, 7, 4) || '-' || "
+        "substr(due_date, 4, 2) || '-' || substr(due_date, 1, 2)) - 1721424.5 AS INTEGER)) VIRTUAL"
+    )
+    database.cursor.execute("SELECT due_date_ord FROM expenses WHERE id = ?", (expense_id,))
+    assert database.cursor.fetchone()[0] is None
+    database.cursor.execute("PRAGMA user_version = 11")
+    database.close()
+    
+    database = Database(path)
+    database.cursor.execute("SELECT due_date_ord FROM expenses WHERE id = ?", (expense_id,))
+    assert database.cursor.fetchone()[0] == date(2026, 10, 10).toordinal()
+    database.close()
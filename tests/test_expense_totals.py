@@ -0,0 +1,71 @@
+"""
+The trigger-maintained expense_totals must stay equal to a fresh sum over
+expenses, however many times the triggers adjust them
+"""
+
+import random
+
+from database.db import Database
+
+
+_FRESH_TOTALS_SQL = """
+    SELECT category,
+           SUM(CAST(ROUND(amount * 100) AS INTEGER)),
+           SUM(CASE WHEN payment_status = 'paid' THEN CAST(ROUND(amount * 100) AS INTEGER) ELSE 0 END),
+           SUM(CASE WHEN payment_status IS NOT 'paid' THEN CAST(ROUND(amount * 100) AS INTEGER) ELSE 0 END),
+           COUNT(*)
+    FROM expenses GROUP BY category ORDER BY category
+"""
+
+
+def _totals(db):
+    db.cursor.execute("""
+        SELECT category, total_paise, paid_paise, pending_paise, count
+        FROM expense_totals WHERE count > 0 ORDER BY category
+    """)
+    return [tuple(row) for row in db.cursor.fetchall()]
+
+
+def _fresh_totals(db):
+    db.cursor.execute(_FRESH_TOTALS_SQL)
+    return [tuple(row) for row in db.cursor.fetchall()]
+
+
+def test_paying_an_expense_leaves_exact_pending_total(tmp_path):
+    db = Database(str(tmp_path / "totals.db"))
+    ids = [db.insert_expense("vendor", amount, "Rent", "", "01-10-2026", "10-10-2026")
+           for amount in (10.1, 20.2, 30.3, 0.7, 0.2)]
+    db.update_expense_payment(ids[0], "05-10-2026")
+    
+    assert _totals(db) == [("Rent", 6150, 1010, 5140, 5)]
+    db.close()
+
+
+def test_totals_match_fresh_sums_after_many_changes(tmp_path):
+    db = Database(str(tmp_path / "totals.db"))
+    rng = random.Random(1)
+    categories = ["Rent", "Travel", "Utilities"]
+    ids = [db.insert_expense("vendor", round(rng.uniform(0, 999), 2), rng.choice(categories),
+                             "", "01-10-2026", "10-10-2026")
+           for _ in range(50)]
+    
+    for _ in range(1000):
+        expense_id = rng.choice(ids)
+        change = rng.random()
+        if change < 0.4:
+            db.cursor.execute("UPDATE expenses SET amount = ? WHERE id = ?",
+                              (round(rng.uniform(0, 999), 2), expense_id))
+        elif change < 0.7:
+            db.cursor.execute("""
+                UPDATE expenses SET payment_status = CASE payment_status
+                    WHEN 'paid' THEN 'pending' ELSE 'paid' END
+                WHERE id = ?
+            """, (expense_id,))
+        elif change < 0.9:
+            db.cursor.execute("UPDATE expenses SET category = ? WHERE id = ?",
+                              (rng.choice(categories), expense_id))
+        else:
+            db.cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+    
+    assert _totals(db) == _fresh_totals(db)
+    db.close()
@@ -0,0 +1,67 @@
+"""
+The ISO date columns must read every stored date format, or rows drop out
+of the GST period filters and creditor aging; generated columns stay out
+of the records the get_* methods return
+"""
+
+import pytest
+
+from database.db import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "iso.db"))
+    yield database
+    database.close()
+
+
+def _insert_sale(db, invoice_no, sale_date):
+    return db.insert_sale(invoice_no=invoice_no, customer_name="customer",
+                          customer_gstin="27AAAAA0000A1Z5", items=[{"qty": 1}],
+                          subtotal=100.0, cgst=9.0, sgst=9.0, igst=0.0, total=118.0,
+                          date=sale_date)
+
+
+@pytest.mark.parametrize("sale_date", [
+    "01-10-2026",
+    "2026-10-01",
+    "2026-10-01 09:30:00",
+    "01/10/2026",
+    "01.10.2026",
+])
+def test_sale_date_formats_give_the_same_iso_date(db, sale_date):
+    sale_id = _insert_sale(db, "INV/001", sale_date)
+    db.cursor.execute("SELECT date_iso FROM sales WHERE id = ?", (sale_id,))
+    assert db.cursor.fetchone()[0] == "2026-10-01"
+
+
+def test_iso_due_date_is_aged(db):
+    db.insert_creditor("dmy", "B1", 100.0, "10-10-2026")
+    db.insert_creditor("iso", "B2", 50.0, "2026-10-10")
+    
+    aged = {row["vendor_name"]: row["days_overdue"] for row in db.get_aged_creditors("2026-10-15")}
+    assert aged == {"dmy": 5, "iso": 5}
+    assert db.get_creditor_aging_buckets("2026-10-15") == [
+        {"bucket": "0-30", "amount": 150.0, "count": 2}
+    ]
+
+
+def test_get_methods_leave_out_generated_columns(db):
+    _insert_sale(db, "INV/001", "01-10-2026")
+    db.insert_creditor("vendor", "B1", 100.0, "10-10-2026")
+    db.insert_expense("vendor", 100.0, "Rent", "", "01-10-2026", "10-10-2026")
+    
+    assert set(db.get_sales()[0]) == {
+        "id", "invoice_no", "customer_name", "customer_gstin", "items_json", "subtotal",
+        "cgst", "sgst", "igst", "total", "date", "tally_synced", "created_at",
+    }
+    assert "due_date_iso" not in db.get_creditors()[0]
+    assert "date_ord" not in db.get_expenses()[0]
+    assert db.get_pending_expenses(0)[0]["days_until_due"] is not None
+    assert "date_iso" not in db.get_sales_df().columns
+    
+    # Asked for by name, a generated column is returned
+    assert db.get_sales(columns=["invoice_no", "date_iso"]) == [
+        {"invoice_no": "INV/001", "date_iso": "2026-10-01"}
+    ]
@@ -0,0 +1,58 @@
+"""
+parse_amount and parse_amount_series must agree cell for cell, since the
+CSV importers use one or the other for the same statement columns
+"""
+
+import pandas as pd
+import pytest
+
+from utils.helpers import parse_amount, parse_amount_series
+
+
+# (cell, amount parse_amount gives for it)
+AMOUNT_CASES = [
+    ("", 0.0),
+    ("0", 0.0),
+    ("1234.50", 1234.5),
+    ("1,234.50", 1234.5),
+    ("12,34,567", 1234567.0),
+    (".5", 0.5),
+    ("5.", 5.0),
+    ("-45", -45.0),
+    ("+45", 45.0),
+    ("₹1,234.50", 1234.5),
+    ("₹ 500", 500.0),
+    ("Rs 500", 500.0),
+    ("Rs. 500", 500.0),
+    ("Rs.500", 500.0),
+    ("rs 500", 0.0),
+    ("(45.00)", -45.0),
+    ("( 1,000 )", -1000.0),
+    ("(Rs. 1,000)", -1000.0),
+    ("(-5)", 5.0),
+    ("(45.00", 0.0),
+    ("45.00)", 0.0),
+    ("  750.25  ", 750.25),
+    ("750\xa0000", 750000.0),
+    ("\t12\n", 12.0),
+    ("1e3", 0.0),
+    ("1E3", 0.0),
+    ("1.2.3", 0.0),
+    (".", 0.0),
+    ("abc", 0.0),
+    ("12 Cr", 0.0),
+    ("nan", 0.0),
+    ("inf", 0.0),
+    ("--5", 0.0),
+]
+
+
+@pytest.mark.parametrize("cell, expected", AMOUNT_CASES)
+def test_parse_amount(cell, expected):
+    assert parse_amount(cell) == expected
+
+
+def test_parse_amount_series_matches_parse_amount():
+    cells = [cell for cell, _ in AMOUNT_CASES]
+    parsed = parse_amount_series(pd.Series(cells, dtype=str)).tolist()
+    assert parsed == [parse_amount(cell) for cell in cells]
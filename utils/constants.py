@@ -38,6 +38,9 @@ HSN_CODES = {
     "9998": {"description": "Restaurant services", "rate": 5},
 }
 
+# HSN code to description, for per-code lookups in reports
+HSN_DESCRIPTIONS = {code: details['description'] for code, details in HSN_CODES.items()}
+
 # TDS Sections with descriptions and rates
 TDS_SECTIONS = {
     "194C": {
@@ -154,6 +157,9 @@ EXPENSE_CATEGORIES = [
     "Others"
 ]
 
+# Membership checks on expense entry (the list above keeps display order)
+EXPENSE_CATEGORIES_SET = frozenset(EXPENSE_CATEGORIES)
+
 # State codes for GST
 STATE_CODES = {
     "01": "Jammu and Kashmir",
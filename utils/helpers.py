@@ -5,9 +5,28 @@ Indian currency formatting, date helpers, validators, etc.
 
 import re
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 from dateutil import parser as date_parser
 
+if TYPE_CHECKING:
+    # NumPy and pandas are imported by the batch helpers on first use
+    import numpy as np
+    import pandas as pd
+
+
+def _group_indian(integer_part: str) -> str:
+    """Insert Indian-style commas into a string of digits (12,34,567)"""
+    if len(integer_part) <= 3:
+        return integer_part
+    
+    # Last 3 digits, then groups of 2 from right to left
+    remaining, last_three = integer_part[:-3], integer_part[-3:]
+    lead = len(remaining) % 2
+    groups = [remaining[:lead]] if lead else []
+    groups.extend(remaining[i:i + 2] for i in range(lead, len(remaining), 2))
+    return ",".join(groups) + "," + last_three
+
 
 def format_indian_currency(amount: float) -> str:
     """
@@ -29,23 +48,29 @@ def format_indian_currency(amount: float) -> str:
     amount_str = f"{amount:.2f}"
     integer_part, decimal_part = amount_str.split(".")
     
-    # Indian numbering system: last 3 digits, then groups of 2
-    if len(integer_part) <= 3:
-        formatted = integer_part
-    else:
-        last_three = integer_part[-3:]
-        remaining = integer_part[:-3]
-        
-        # Add commas every 2 digits from right to left
-        formatted_remaining = ""
-        for i, digit in enumerate(reversed(remaining)):
-            if i > 0 and i % 2 == 0:
-                formatted_remaining = "," + formatted_remaining
-            formatted_remaining = digit + formatted_remaining
+    return f"{sign}₹{_group_indian(integer_part)}.{decimal_part}"
+
+
+def format_indian_currency_batch(amounts: Iterable[float]) -> List[str]:
+    """
+    Format many amounts in Indian currency style in one pass
+    
+    Args:
+        amounts: Amounts to format
         
-        formatted = formatted_remaining + "," + last_three
+    Returns:
+        List of formatted currency strings, in input order
+    """
+    group = _group_indian
+    formatted = []
+    append = formatted.append
+    
+    for amount in amounts:
+        sign = "-" if amount < 0 else ""
+        integer_part, decimal_part = f"{abs(amount):.2f}".split(".")
+        append(f"{sign}₹{group(integer_part)}.{decimal_part}")
     
-    return f"{sign}₹{formatted}.{decimal_part}"
+    return formatted
 
 
 def get_financial_year(date: Optional[datetime] = None) -> str:
@@ -98,16 +123,30 @@ def get_quarter(date: Optional[datetime] = None) -> str:
         return "Q4"
 
 
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+@lru_cache(maxsize=4096)
 def parse_date(date_string: str) -> Optional[datetime]:
     """
     Parse date from various formats (DD/MM/YYYY, DD-MM-YYYY, YYYY-MM-DD, etc.)
     
+    Results are cached, since statements and ledgers repeat the same dates.
+    
     Args:
         date_string: Date string to parse
         
     Returns:
         datetime object or None if parsing fails
     """
+    # ISO dates skip format detection (dateutil's dayfirst would also
+    # swap their month and day)
+    if isinstance(date_string, str) and _ISO_DATE_RE.fullmatch(date_string):
+        try:
+            return datetime.strptime(date_string, "%Y-%m-%d")
+        except ValueError:
+            pass
+    
     try:
         # Try dateutil parser (handles most formats)
         return date_parser.parse(date_string, dayfirst=True)
@@ -131,11 +170,81 @@ def parse_date(date_string: str) -> Optional[datetime]:
         return None
 
 
+# Characters dropped from amount cells before parsing: rupee sign, thousands
+# separators and whitespace (including non-breaking spaces from PDFs)
+_AMOUNT_DELETE = str.maketrans('', '', '₹, \t\r\n\xa0')
+
+# Characters of a plain amount (1234.56, 1,234.56); a cell made only of
+# these skips the regex
+_AMOUNT_PLAIN = str.maketrans('', '', '0123456789.,')
+
+# Optional "Rs"/"Rs." prefix and a number, negative when wrapped in parentheses
+_AMOUNT_RE = re.compile(r'(\()?(?:Rs\.?)?([-+]?(?:\d+(?:\.\d*)?|\.\d+))(?(1)\))')
+
+
+def parse_amount(amount_str: str) -> float:
+    """
+    Parse an amount cell from a bank statement (₹1,234.50, Rs 500, (45.00))
+    
+    Args:
+        amount_str: Amount string to parse
+        
+    Returns:
+        Amount as float, negative for parenthesised values, 0.0 if unparseable
+    """
+    if not amount_str:
+        return 0.0
+    
+    amount_str = str(amount_str)
+    if not amount_str.translate(_AMOUNT_PLAIN):
+        try:
+            return float(amount_str.replace(',', ''))
+        except ValueError:
+            return 0.0
+    
+    match = _AMOUNT_RE.fullmatch(amount_str.translate(_AMOUNT_DELETE))
+    if not match:
+        return 0.0
+    
+    amount = float(match.group(2))
+    return -amount if match.group(1) else amount
+
+
+def parse_amount_series(amounts: "pd.Series") -> "pd.Series":
+    """
+    Vectorized parse_amount over a column of amount strings
+    
+    Applies parse_amount's own character deletions and pattern column-wise,
+    so every cell parses exactly as parse_amount would parse it.
+    
+    Args:
+        amounts: Series of amount strings
+        
+    Returns:
+        Series of floats, negative for parenthesised values, 0.0 where
+        unparseable
+    """
+    import pandas as pd
+    
+    parts = (amounts.astype(str)
+                    .str.translate(_AMOUNT_DELETE)
+                    .str.extract(rf'\A(?:{_AMOUNT_RE.pattern})\Z'))
+    values = pd.to_numeric(parts[1], errors='coerce').fillna(0.0).astype(float)
+    return values.where(parts[0].isna(), -values)
+
+
+_GSTIN_RE = re.compile(r'[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}')
+
+
+@lru_cache(maxsize=4096)
 def validate_gstin(gstin: str) -> bool:
     """
     Validate GSTIN format
     Format: 22AAAAA0000A1Z5 (15 characters)
     
+    Results are cached, since reports check the same parties' GSTINs
+    over and over.
+    
     Args:
         gstin: GSTIN to validate
         
@@ -145,8 +254,7 @@ def validate_gstin(gstin: str) -> bool:
     if not gstin or len(gstin) != 15:
         return False
     
-    pattern = r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}$'
-    return bool(re.match(pattern, gstin.upper()))
+    return bool(_GSTIN_RE.fullmatch(gstin.upper()))
 
 
 def validate_pan(pan: str) -> bool:
@@ -167,6 +275,7 @@ def validate_pan(pan: str) -> bool:
     return bool(re.match(pattern, pan.upper()))
 
 
+@lru_cache(maxsize=4096)
 def extract_state_from_gstin(gstin: str) -> Optional[Tuple[str, str]]:
     """
     Extract state code and name from GSTIN
@@ -285,6 +394,56 @@ def calculate_gst(amount: float, gst_rate: float, is_intra_state: bool = True) -
     }
 
 
+def _round2(values: "np.ndarray") -> "np.ndarray":
+    """Round an array to 2 decimals exactly as the builtin round() would"""
+    import numpy as np
+    
+    result = values.round(2)
+    # NumPy rounds the value scaled by 100, which can land on a false
+    # half-cent tie (2830.495 is stored just below it); defer those to
+    # round(), which rounds the exact binary value
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        result[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+    return result
+
+
+def calculate_gst_batch(amounts: Iterable[float], gst_rates: Iterable[float],
+                        is_intra_state: Iterable[bool]) -> Dict[str, "np.ndarray"]:
+    """
+    Calculate GST breakdowns for many line items at once
+    
+    Vectorized counterpart of calculate_gst for bulk imports: the whole
+    batch is computed with NumPy array operations instead of one Python
+    call per item.
+    
+    Args:
+        amounts: Taxable amounts
+        gst_rates: GST rate percentages
+        is_intra_state: Per item, True for CGST+SGST, False for IGST
+        
+    Returns:
+        Dict of float arrays (cgst, sgst, igst, total_gst, total_amount),
+        rounded to 2 decimals like calculate_gst
+    """
+    import numpy as np
+    
+    amounts = np.asarray(amounts, dtype=np.float64)
+    gst_amount = amounts * np.asarray(gst_rates, dtype=np.float64) / 100
+    is_intra = np.asarray(is_intra_state, dtype=bool)
+    
+    half = _round2(np.where(is_intra, gst_amount / 2, 0.0))
+    
+    return {
+        "cgst": half,
+        "sgst": half.copy(),
+        "igst": _round2(np.where(is_intra, 0.0, gst_amount)),
+        "total_gst": _round2(gst_amount),
+        "total_amount": _round2(amounts + gst_amount)
+    }
+
+
 def words_to_number(amount: float) -> str:
     """
     Convert amount to words (Indian style)